@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Cold archive for aged LinkedBench events
+
+Events older than N days are moved out of the live SQLite file into
+gzip-compressed JSON-lines chunks, one chunk per day and archival run:
+
+    events_archive/
+        index.jsonl                      one line per chunk
+        2025-01-14.000123.jsonl.gz       events of that day, oldest first
+
+Chunks are never rewritten and the index is only appended to. Each index
+line holds the chunk's time and id range plus, per bench, its time span
+and counts per event type and mode, so most queries are answered without
+decompressing anything. EventDatabase reads the archive transparently.
+
+Run the archival job from cron or a systemd timer:
+
+    python3 archive.py --days 30
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger('LinkedBench.Archive')
+
+INDEX_FILE = 'index.jsonl'
+CHUNK_CACHE_SIZE = 4
+
+
+def default_archive_path(db_path: str) -> str:
+    """events.db -> events_archive/ next to it"""
+    path = Path(db_path)
+    return str(path.with_name(f"{path.stem}_archive"))
+
+
+def _fsync_dir(path: Path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class EventArchive:
+    """Append-only, day-chunked, compressed event archive"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._index_path = self.path / INDEX_FILE
+        self._chunks: List[Dict[str, Any]] = []
+        self._index_stamp = None
+        self._cache: 'OrderedDict[str, List[Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ================= INDEX =================
+
+    def chunks(self) -> List[Dict[str, Any]]:
+        """Index entries, oldest first; reloaded when another process appends"""
+        try:
+            st = os.stat(self._index_path)
+        except FileNotFoundError:
+            return []
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if stamp != self._index_stamp:
+                chunks = []
+                with open(self._index_path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            chunks.append(json.loads(line))
+                        except ValueError:
+                            # Torn last line after a crash; the chunk is redone
+                            logger.warning("Skipping damaged archive index line")
+                chunks.sort(key=lambda c: (c['start'], c['min_id']))
+                self._chunks = chunks
+                self._index_stamp = stamp
+            return self._chunks
+
+    def last_run(self) -> List[Dict[str, Any]]:
+        """Chunks written by the most recent archival run"""
+        chunks = self.chunks()
+        if not chunks:
+            return []
+        run = max(c['run_max_id'] for c in chunks)
+        return [c for c in chunks if c['run_max_id'] == run]
+
+    # ================= WRITING =================
+
+    def write_chunk(self, rows: List[Dict[str, Any]], run_max_id: int) -> Dict[str, Any]:
+        """Write one chunk (rows oldest first) and append it to the index"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        name = f"{rows[0]['timestamp'][:10]}.{rows[0]['id']:06d}.jsonl.gz"
+        tmp = self.path / (name + '.tmp')
+
+        counts: Dict[str, Dict[str, Counter]] = {}
+        spans: Dict[str, List[str]] = {}
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, separators=(',', ':')) + '\n')
+                spans.setdefault(row['bench_id'], [row['timestamp'], None])[1] = row['timestamp']
+                bench = counts.setdefault(row['bench_id'], {'events_by_type': Counter(),
+                                                             'mode_distribution': Counter()})
+                bench['events_by_type'][row['event_type']] += 1
+                if row.get('mode_name') is not None:
+                    bench['mode_distribution'][row['mode_name']] += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path / name)
+
+        self._repair_index_tail()
+        entry = {
+            'file': name,
+            'start': rows[0]['timestamp'],
+            'end': rows[-1]['timestamp'],
+            'count': len(rows),
+            'min_id': min(row['id'] for row in rows),
+            'max_id': max(row['id'] for row in rows),
+            'run_max_id': run_max_id,
+            'benches': {bench_id: {**{key: dict(counter) for key, counter in c.items()},
+                                   'start': spans[bench_id][0], 'end': spans[bench_id][1]}
+                        for bench_id, c in counts.items()},
+        }
+        with open(self._index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        _fsync_dir(self.path)
+        return entry
+
+    def _repair_index_tail(self):
+        """
+        Cut a torn last line (crash while appending) so the next entry starts
+        on a line of its own. Its chunk was never deleted from the live
+        table and is archived again by the next run.
+        """
+        try:
+            with open(self._index_path, 'rb+') as f:
+                data = f.read()
+                if not data or data.endswith(b'\n'):
+                    return
+                f.truncate(data.rfind(b'\n') + 1)
+                f.flush()
+                os.fsync(f.fileno())
+        except FileNotFoundError:
+            return
+        logger.warning("Removed a torn line at the end of the archive index")
+
+    def is_indexed(self, entry: Dict[str, Any]) -> bool:
+        """True if the index, read back from disk, holds this entry"""
+        return any(c['file'] == entry['file'] and c['max_id'] == entry['max_id']
+                   and c['run_max_id'] == entry['run_max_id'] for c in self.chunks())
+
+    # ================= READING =================
+
+    def _load(self, chunk: Dict[str, Any]) -> List[Dict[str, Any]]:
+        name = chunk['file']
+        with self._lock:
+            rows = self._cache.get(name)
+            if rows is not None:
+                self._cache.move_to_end(name)
+                return rows
+        with gzip.open(self.path / name, 'rt', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        with self._lock:
+            self._cache[name] = rows
+            while len(self._cache) > CHUNK_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return rows
+
+    @staticmethod
+    def _matches(chunk: Dict[str, Any], bench_id: Optional[str],
+                 event_type: Optional[str]) -> int:
+        """Number of events in the chunk matching the filters, from the index"""
+        benches = chunk['benches']
+        if bench_id is not None:
+            benches = {bench_id: benches[bench_id]} if bench_id in benches else {}
+        total = 0
+        for counts in benches.values():
+            by_type = counts['events_by_type']
+            total += by_type.get(event_type, 0) if event_type else sum(by_type.values())
+        return total
+
+    @staticmethod
+    def _filter(rows: Iterable[Dict[str, Any]], bench_id: Optional[str],
+                event_type: Optional[str]) -> List[Dict[str, Any]]:
+        return [row for row in rows
+                if (bench_id is None or row['bench_id'] == bench_id)
+                and (event_type is None or row['event_type'] == event_type)]
+
+    def get_events(self, bench_id: Optional[str] = None, limit: int = 100,
+                   offset: int = 0, event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Archived events, newest first; skips whole chunks using the index"""
+        result: List[Dict[str, Any]] = []
+        for chunk in reversed(self.chunks()):
+            if len(result) >= limit:
+                break
+            matching = self._matches(chunk, bench_id, event_type)
+            if matching <= offset:
+                offset -= matching
+                continue
+            rows = self._filter(self._load(chunk), bench_id, event_type)
+            rows.sort(key=lambda r: (r['timestamp'], r['id']), reverse=True)
+            result.extend(rows[offset:offset + limit - len(result)])
+            offset = 0
+        return result
+
+    def get_events_after(self, after: Optional[Tuple[str, int]] = None, limit: int = 1000,
+                         since: Optional[str] = None, until: Optional[str] = None,
+                         event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Archived events in ascending (timestamp, id) order after the cursor"""
+        lower = max(after[0] if after else '', since or '')
+        result: List[Dict[str, Any]] = []
+        for chunk in self.chunks():
+            if chunk['end'] < lower or (until and chunk['start'] >= until):
+                continue
+            # Chunks are sorted by start: later ones cannot sort before what we have
+            if len(result) >= limit and chunk['start'] > result[limit - 1]['timestamp']:
+                break
+            if event_type and not self._matches(chunk, None, event_type):
+                continue
+            for row in self._filter(self._load(chunk), None, event_type):
+                key = (row['timestamp'], row['id'])
+                if after and key <= tuple(after):
+                    continue
+                if (since and key[0] < since) or (until and key[0] >= until):
+                    continue
+                result.append(row)
+            result.sort(key=lambda r: (r['timestamp'], r['id']))
+            del result[limit:]
+        return result
+
+    def get_event(self, event_id: int) -> Optional[Dict[str, Any]]:
+        for chunk in self.chunks():
+            if chunk['min_id'] <= event_id <= chunk['max_id']:
+                for row in self._load(chunk):
+                    if row['id'] == event_id:
+                        return row
+        return None
+
+    def statistics(self, since: str, bench_id: Optional[str] = None) -> Dict[str, Counter]:
+        """Counts of archived events newer than `since` (ISO timestamp)"""
+        by_type, modes = Counter(), Counter()
+        for chunk in self.chunks():
+            if chunk['end'] <= since:
+                continue
+            if chunk['start'] > since:
+                # Whole chunk inside the window: the index is enough
+                benches = chunk['benches']
+                if bench_id is not None:
+                    benches = {bench_id: benches[bench_id]} if bench_id in benches else {}
+                for counts in benches.values():
+                    by_type.update(counts['events_by_type'])
+                    modes.update(counts['mode_distribution'])
+                continue
+            for row in self._filter(self._load(chunk), bench_id, None):
+                if row['timestamp'] > since:
+                    by_type[row['event_type']] += 1
+                    if row.get('mode_name') is not None:
+                        modes[row['mode_name']] += 1
+        return {'events_by_type': by_type, 'mode_distribution': modes}
+
+    def bench_ranges(self) -> Dict[str, Tuple[str, str]]:
+        """(first, last) archived timestamp per bench, from the index"""
+        ranges: Dict[str, Tuple[str, str]] = {}
+        for chunk in self.chunks():
+            for bench_id, counts in chunk['benches'].items():
+                # Entries written before per-bench spans: the chunk's span
+                first = counts.get('start', chunk['start'])
+                last = counts.get('end', chunk['end'])
+                if bench_id in ranges:
+                    first = min(first, ranges[bench_id][0])
+                    last = max(last, ranges[bench_id][1])
+                ranges[bench_id] = (first, last)
+        return ranges
+
+    def stats(self) -> Dict[str, Any]:
+        chunks = self.chunks()
+        return {
+            'chunks': len(chunks),
+            'events': sum(c['count'] for c in chunks),
+            'bytes': sum(os.path.getsize(self.path / c['file']) for c in chunks
+                         if (self.path / c['file']).exists()),
+            'oldest': chunks[0]['start'] if chunks else None,
+            'newest': max(c['end'] for c in chunks) if chunks else None,
+        }
+
+
+def main():
+    import argparse
+    from database import EventDatabase
+
+    parser = argparse.ArgumentParser(description="Move aged LinkedBench events to the archive")
+    parser.add_argument('--db', default="/var/lib/linkedbench/events.db")
+    parser.add_argument('--archive', default=None,
+                        help="archive directory (default: <db name>_archive next to the db)")
+    parser.add_argument('--days', type=int, default=30,
+                        help="archive events older than this many days")
+    parser.add_argument('--vacuum', action='store_true',
+                        help="VACUUM the live database afterwards to return the space")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+    db = EventDatabase(args.db, archive_path=args.archive)
+    try:
+        moved = db.archive_old_events(days=args.days)
+        if args.vacuum and moved:
+            db.conn.execute("VACUUM")
+        logger.info("Archive: %s", db.archive.stats())
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
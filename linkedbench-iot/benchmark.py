@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for LinkedBench hot paths
+
+Covers:
+- EventDatabase inserts (single and batched), get_events at several
+  offsets and get_statistics against databases of different sizes
+- event-to-sink latency through LinkedBenchSystem._event_processor
+- CPU and memory per event for Event records vs the old dicts
+- REST endpoint throughput using Flask's test client
+- dashboard bytes on the wire and modelled time to first paint
+- sensor-loop jitter under API-like load, in the single-process and
+  multi-process layouts (see process_layout.py)
+
+Results are written as JSON. A previous results file can be passed with
+--compare to flag regressions:
+
+    python3 benchmark.py --output baseline.json
+    python3 benchmark.py --compare baseline.json
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import queue
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List
+
+from database import EventDatabase
+from events import Event, encode
+from recent_events import RecentEvents
+from scheduler import DeadlineScheduler
+
+logger = logging.getLogger('LinkedBench.Benchmark')
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+MODES = [
+    (1, "Available"),
+    (2, "Studying"),
+    (3, "Open to chat"),
+    (4, "Study buddy"),
+]
+
+
+# ================= SYNTHETIC DATA =================
+
+def generate_events(count: int, bench_id: str = "BENCH_001", days: int = 30,
+                    seed: int = 42, end: datetime = None) -> Iterator[Dict[str, Any]]:
+    """Yield realistic events in time order spread over the last `days` days"""
+    rng = random.Random(seed)
+    end = end or datetime.now()
+    start = end - timedelta(days=days)
+    step = (end - start) / max(count, 1)
+    occupied = False
+    mode, mode_name = MODES[0]
+
+    for i in range(count):
+        timestamp = (start + step * i).isoformat()
+        roll = rng.random()
+        if not occupied:
+            seats = 1 if roll < 0.8 else 2
+            mode, mode_name = MODES[0] if seats == 1 else MODES[3]
+            occupied = True
+            event = {'event_type': 'occupation', 'bench_id': bench_id, 'seats': seats,
+                     'mode': mode, 'mode_name': mode_name, 'timestamp': timestamp}
+        elif roll < 0.4 and mode != 4:
+            mode, mode_name = MODES[rng.randint(0, 2)]
+            event = {'event_type': 'mode_change', 'bench_id': bench_id,
+                     'mode': mode, 'mode_name': mode_name, 'timestamp': timestamp}
+        else:
+            occupied = False
+            event = {'event_type': 'vacation', 'bench_id': bench_id, 'timestamp': timestamp}
+        yield event
+
+
+def build_database(path: str, count: int, seed: int = 42) -> str:
+    """Create (or reuse) a database filled with `count` synthetic events"""
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        existing = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        conn.close()
+        if existing == count:
+            return path
+        os.remove(path)
+
+    logger.info(f"Generating {count} events in {path}")
+    EventDatabase(path).close()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    sql = """
+        INSERT INTO events (bench_id, event_type, mode, mode_name, timestamp, data)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+    batch = []
+    for event in generate_events(count, seed=seed):
+        batch.append((event['bench_id'], event['event_type'], event.get('mode'),
+                      event.get('mode_name'), event['timestamp'], json.dumps(event)))
+        if len(batch) >= 50_000:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+    conn.commit()
+    conn.close()
+    return path
+
+
+# ================= MEASUREMENT =================
+
+def measure(fn: Callable[[], Any], repeat: int = 5, number: int = 1) -> float:
+    """Median wall time (s) of `number` calls, over `repeat` runs"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times)
+
+
+class Results:
+    """Collects metrics as {name: {value, unit, higher_is_better}}"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, value: float, unit: str, higher_is_better: bool):
+        self.metrics[name] = {'value': round(value, 6), 'unit': unit,
+                              'higher_is_better': higher_is_better}
+        print(f"  {name:<45} {value:>14.3f} {unit}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'metrics': self.metrics,
+        }
+
+
+# ================= BENCHMARKS =================
+
+def bench_inserts(results: Results, workdir: str, count: int):
+    print("Inserts")
+    events = list(generate_events(count))
+
+    db = EventDatabase(os.path.join(workdir, 'insert_single.db'))
+    start = time.perf_counter()
+    for event in events:
+        db.save_event(event)
+    elapsed = time.perf_counter() - start
+    db.close()
+    results.add('insert.single.events_per_s', count / elapsed, 'events/s', True)
+
+    db = EventDatabase(os.path.join(workdir, 'insert_batch.db'))
+    start = time.perf_counter()
+    for i in range(0, count, 100):
+        db.save_events(events[i:i + 100])
+    elapsed = time.perf_counter() - start
+    db.close()
+    results.add('insert.batch100.events_per_s', count / elapsed, 'events/s', True)
+
+
+def bench_queries(results: Results, datadir: str, sizes: List[str], repeat: int):
+    for label in sizes:
+        count = SIZES[label]
+        print(f"Queries ({label} rows)")
+        path = build_database(os.path.join(datadir, f'events_{label}.db'), count)
+        db = EventDatabase(path)
+
+        for offset in (0, 1_000, 100_000):
+            if offset >= count:
+                continue
+            t = measure(lambda: db.get_events(limit=10, offset=offset), repeat)
+            results.add(f'get_events.{label}.offset{offset}_ms', t * 1000, 'ms', False)
+
+        t = measure(lambda: db.get_events(limit=10, event_type='occupation'), repeat)
+        results.add(f'get_events.{label}.by_type_ms', t * 1000, 'ms', False)
+
+        recent = RecentEvents()
+        recent.seed(db.get_events(limit=recent.capacity + 1))
+        t = measure(lambda: recent.lookup(10), repeat, number=100)
+        results.add(f'recent_events.{label}.limit10_us', t * 1e6, 'us', False)
+
+        t = measure(lambda: db.get_statistics(days=7), repeat)
+        results.add(f'get_statistics.{label}.7d_ms', t * 1000, 'ms', False)
+        db.close()
+
+
+class _LatencySink:
+    """Stands in for the MQTT publisher and timestamps every delivery"""
+
+    def __init__(self, expected: int):
+        self.latencies = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def publish_event(self, event):
+        self.latencies.append(time.perf_counter() - event['_bench_t0'])
+        if len(self.latencies) >= self.expected:
+            self.done.set()
+        return True
+
+
+def bench_pipeline(results: Results, workdir: str, count: int):
+    try:
+        from linkedbench3 import LinkedBenchSystem
+    except ImportError as e:
+        print(f"Pipeline: skipped ({e})")
+        return
+
+    print("Pipeline")
+    sink = _LatencySink(count)
+    system = SimpleNamespace(running=True, event_queue=queue.Queue(),
+                             db=EventDatabase(os.path.join(workdir, 'pipeline.db')),
+                             recent_events=RecentEvents(), mqtt=sink)
+    errors = []
+
+    def process():
+        try:
+            LinkedBenchSystem._event_processor(system)
+        except BaseException as e:
+            errors.append(e)
+            raise
+
+    worker = threading.Thread(target=process, daemon=True)
+    worker.start()
+
+    # Paced like real traffic so latency is not dominated by queueing
+    for event in generate_events(count):
+        event['_bench_t0'] = time.perf_counter()
+        system.event_queue.put(event)
+        time.sleep(0.001)
+
+    deadline = time.monotonic() + 60
+    while worker.is_alive() and time.monotonic() < deadline:
+        if sink.done.wait(timeout=0.1):
+            break
+    system.running = False
+    worker.join()
+    system.db.close()
+
+    if errors:
+        raise RuntimeError(f"Pipeline worker died: {errors[0]!r}") from errors[0]
+    latencies = sorted(sink.latencies)
+    if len(latencies) < count:
+        raise RuntimeError(f"Pipeline: only {len(latencies)} of {count} events delivered")
+    results.add('pipeline.latency.p50_ms', latencies[len(latencies) // 2] * 1000, 'ms', False)
+    results.add('pipeline.latency.p95_ms', latencies[int(len(latencies) * 0.95)] * 1000, 'ms', False)
+
+
+def _legacy_event(bench_id: str, mode: int, mode_name: str) -> Dict[str, Any]:
+    """Event as built before the Event record: a dict with an eager timestamp"""
+    return {
+        'event_type': 'mode_change',
+        'bench_id': bench_id,
+        'mode': mode,
+        'mode_name': mode_name,
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def _record_event(bench_id: str, mode: int, mode_name: str) -> Event:
+    return Event('mode_change', bench_id, time.time(), mode=mode, mode_name=mode_name)
+
+
+def _publish(event) -> bytes:
+    # What MQTTPublisher.publish_event hands to paho (which encodes str payloads)
+    return event.payload if isinstance(event, Event) else json.dumps(event).encode('utf-8')
+
+
+def bench_events(results: Results, count: int):
+    """Per-event CPU and memory: legacy dicts vs Event records"""
+    print("Event records")
+    for label, build in (('dict', _legacy_event), ('record', _record_event)):
+        # Memory held by events waiting in the queue (e.g. while SQLite is slow)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        queued = [build("BENCH_001", i % 4, MODES[i % 4][1]) for i in range(count)]
+        held = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del queued
+
+        def cpu_per_event(step, repeat=5):
+            times = []
+            for _ in range(repeat):
+                start = time.process_time()
+                for i in range(count):
+                    step(i)
+                times.append((time.process_time() - start) / count)
+            return statistics.median(times)
+
+        # Sensor thread: building the event
+        produce = cpu_per_event(lambda i: build("BENCH_001", i % 4, MODES[i % 4][1]))
+
+        # Event processor without SQLite: data column, history, MQTT payload
+        recent = RecentEvents()
+        ids = itertools.count(1)
+
+        def sinks(i):
+            event = build("BENCH_001", i % 4, MODES[i % 4][1])
+            encode(event)
+            recent.append(next(ids), event)
+            _publish(event)
+        serialize = cpu_per_event(sinks)
+
+        # ...and the full path through an in-memory database
+        db = EventDatabase(':memory:')
+        recent = RecentEvents()
+
+        def pipeline_step(i):
+            event = build("BENCH_001", i % 4, MODES[i % 4][1])
+            recent.append(db.save_event(event), event)
+            _publish(event)
+        pipeline = cpu_per_event(pipeline_step)
+        db.close()
+
+        results.add(f'events.{label}.bytes_per_queued_event', held / count, 'B', False)
+        results.add(f'events.{label}.produce_us', produce * 1e6, 'us', False)
+        results.add(f'events.{label}.sinks_cpu_us', serialize * 1e6, 'us', False)
+        results.add(f'events.{label}.pipeline_cpu_us', pipeline * 1e6, 'us', False)
+
+
+def _api_system(datadir: str) -> SimpleNamespace:
+    """Stand-in for LinkedBenchSystem over the 10k database, for the API benchmarks"""
+    db = EventDatabase(build_database(os.path.join(datadir, 'events_10k.db'), SIZES['10k']))
+    recent = RecentEvents()
+    recent.seed(db.get_events(bench_id="BENCH_001", limit=recent.capacity + 1))
+
+    def get_events(limit=100, offset=0, event_type=None):
+        # Same lookup order as LinkedBenchSystem.get_events
+        events = recent.lookup(limit, offset, event_type)
+        if events is None:
+            events = db.get_events(bench_id="BENCH_001", limit=limit,
+                                   offset=offset, event_type=event_type)
+        return events
+
+    return SimpleNamespace(
+        bench_id="BENCH_001",
+        db=db,
+        get_events=get_events,
+        get_status=lambda: {'bench_id': "BENCH_001", 'occupied': True, 'mode': 1,
+                            'mode_name': "Available", 'timestamp': datetime.now().isoformat()},
+        get_command_stats=lambda: {'count': 0},
+    )
+
+
+def bench_api(results: Results, datadir: str, requests: int):
+    try:
+        from rest_api import create_app
+    except ImportError as e:
+        print(f"REST API: skipped ({e})")
+        return
+
+    print("REST API")
+    system = _api_system(datadir)
+    app = create_app(system)
+    if app is None:
+        print("REST API: skipped (Flask not installed)")
+        return
+    client = app.test_client()
+
+    for name, url in (('status', '/api/status'),
+                      ('events10', '/api/events?limit=10'),
+                      ('events_offset1000', '/api/events?limit=10&offset=1000'),
+                      ('statistics', '/api/statistics')):
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get(url)
+        elapsed = time.perf_counter() - start
+        results.add(f'api.{name}.req_per_s', requests / elapsed, 'req/s', True)
+    system.db.close()
+
+
+# Campus Wi-Fi as seen by a phone at the edge of the cell
+WIFI_RTT = 0.040                # s
+WIFI_BYTES_PER_S = 2e6 / 8      # 2 Mbit/s
+
+
+def _fetch(client, url: str, headers: Dict[str, str]) -> Dict[str, float]:
+    """One request: bytes on the wire (status line + headers + body) and server time"""
+    start = time.perf_counter()
+    response = client.get(url, headers=headers)
+    server = time.perf_counter() - start
+    head = 17 + sum(len(k) + len(v) + 4 for k, v in response.headers.items()) + 2
+    body = len(response.get_data())
+    return {'bytes': head + body, 'server': server, 'etag': response.headers.get('ETag')}
+
+
+def _transfer(fetches: List[Dict[str, float]]) -> float:
+    """Time for one round of parallel requests over the modelled link"""
+    return (WIFI_RTT + max(f['server'] for f in fetches)
+            + sum(f['bytes'] for f in fetches) / WIFI_BYTES_PER_S)
+
+
+def bench_dashboard(results: Results, datadir: str):
+    """Bytes on the wire and modelled time to first paint / first data"""
+    try:
+        from rest_api import create_app
+        from static_assets import DASHBOARD_PATH
+    except ImportError as e:
+        print(f"Dashboard: skipped ({e})")
+        return
+
+    system = _api_system(datadir)
+    app = create_app(system)
+    if app is None:
+        print("Dashboard: skipped (Flask not installed)")
+        return
+    print("Dashboard")
+    client = app.test_client()
+    gzip_ok = {'Accept-Encoding': 'gzip, deflate'}
+    api_urls = ('/api/status', '/api/statistics?days=7', '/api/events?limit=10')
+
+    # Before: dashboard.html sent raw on every visit, API JSON uncompressed
+    raw = Path(DASHBOARD_PATH).read_bytes()
+    legacy_page = {'bytes': 17 + 160 + len(raw), 'server': 0.0}
+    legacy_api = [_fetch(client, url, {}) for url in api_urls]
+
+    # First visit: page, then the deferred script, then the API calls it makes
+    page = _fetch(client, '/dashboard', gzip_ok)
+    script_url = re.search(rb'src="(/assets/[^"]+)"', client.get('/dashboard').get_data())
+    scripts = [_fetch(client, script_url.group(1).decode(), gzip_ok)] if script_url else []
+    api = [_fetch(client, url, gzip_ok) for url in api_urls]
+    # Repeat visit: 304 for the page, script from the browser cache
+    revalidated = _fetch(client, '/dashboard', dict(gzip_ok, **{'If-None-Match': page['etag']}))
+
+    def total(*groups):
+        return sum(f['bytes'] for group in groups for f in group)
+
+    results.add('dashboard.legacy.bytes', total([legacy_page], legacy_api), 'B', False)
+    results.add('dashboard.first_visit.bytes', total([page], scripts, api), 'B', False)
+    results.add('dashboard.repeat_visit.bytes', total([revalidated], api), 'B', False)
+
+    # Inline CSS: first paint needs only the page
+    results.add('dashboard.legacy.first_paint_ms', _transfer([legacy_page]) * 1000, 'ms', False)
+    results.add('dashboard.first_visit.first_paint_ms', _transfer([page]) * 1000, 'ms', False)
+    results.add('dashboard.repeat_visit.first_paint_ms', _transfer([revalidated]) * 1000, 'ms', False)
+
+    # Data shown: page, script (if not cached), then the three API calls in parallel
+    first_data = _transfer([page]) + (_transfer(scripts) if scripts else 0) + _transfer(api)
+    results.add('dashboard.legacy.first_data_ms',
+                (_transfer([legacy_page]) + _transfer(legacy_api)) * 1000, 'ms', False)
+    results.add('dashboard.first_visit.first_data_ms', first_data * 1000, 'ms', False)
+    results.add('dashboard.repeat_visit.first_data_ms',
+                (_transfer([revalidated]) + _transfer(api)) * 1000, 'ms', False)
+    system.db.close()
+
+
+def _sampling_jitter(duration: float, rate_hz: float = 100.0, **options) -> Dict[str, Any]:
+    """Latency/jitter of a DeadlineScheduler task, like the sensor loop but faster"""
+    scheduler = DeadlineScheduler(**options)
+    # A little work per sample, as in _seat_step
+    task = scheduler.add("sample", rate_hz, lambda: sum(range(200)))
+    end = time.monotonic() + duration
+    try:
+        scheduler.run(lambda: time.monotonic() < end, time.sleep)
+    finally:
+        sys.setswitchinterval(0.005)
+    return task.stats()
+
+
+def _api_load(db_path: str, stop):
+    """What a busy API does: statistics queries and JSON encoding"""
+    db = EventDatabase(db_path)
+    while not stop.is_set():
+        db.get_statistics(days=7)
+        json.dumps(db.get_events(limit=100))
+    db.close()
+
+
+def bench_jitter(results: Results, datadir: str, duration: float = 5.0, workers: int = 2):
+    """
+    Sampling jitter with no load, with API-like load in threads of the
+    same interpreter (single-process layout), and with the same load in
+    separate processes (process_layout)
+    """
+    import multiprocessing as mp
+
+    print("Sensor loop jitter under API load")
+    db_path = build_database(os.path.join(datadir, 'events_100k.db'), SIZES['100k'])
+    ctx = mp.get_context('spawn')
+
+    # threads_tuned: same load, with the [sampling] options of config.ini
+    for scenario in ('idle', 'threads', 'threads_tuned', 'processes'):
+        if scenario.startswith('threads'):
+            stop = threading.Event()
+            loaders = [threading.Thread(target=_api_load, args=(db_path, stop), daemon=True)
+                       for _ in range(workers)]
+        elif scenario == 'processes':
+            stop = ctx.Event()
+            loaders = [ctx.Process(target=_api_load, args=(db_path, stop), daemon=True)
+                       for _ in range(workers)]
+        else:
+            stop, loaders = None, []
+        options = {'gc_defer': True, 'switch_interval': 0.001} if scenario == 'threads_tuned' else {}
+
+        for loader in loaders:
+            loader.start()
+        time.sleep(0.5 if loaders else 0)
+        stats = _sampling_jitter(duration, **options)
+        if stop:
+            stop.set()
+        for loader in loaders:
+            loader.join()
+
+        # Bucket upper bounds, see scheduler.Histogram
+        latency = stats['latency']
+        results.add(f'jitter.{scenario}.p50_ms', latency['p50_ms'], 'ms', False)
+        results.add(f'jitter.{scenario}.p99_ms', latency['p99_ms'], 'ms', False)
+        results.add(f'jitter.{scenario}.max_ms', latency['max_ms'], 'ms', False)
+        results.add(f'jitter.{scenario}.period_p99_ms', stats['jitter']['p99_ms'], 'ms', False)
+        results.add(f'jitter.{scenario}.overruns', stats['overruns'], 'count', False)
+
+
+# ================= COMPARISON =================
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return the metrics that got worse than the baseline by more than threshold"""
+    regressions = []
+    print(f"\nComparison against baseline ({baseline.get('created', '?')}):")
+    base_metrics = baseline.get('metrics', {})
+    for name, metric in sorted(current['metrics'].items()):
+        base = base_metrics.get(name)
+        if not base:
+            continue
+        if base['value']:
+            change = (metric['value'] - base['value']) / base['value']
+            limit, label = threshold, f"{change:+.1%}"
+        else:
+            # Zero baseline (e.g. overrun counts): any absolute change for the worse
+            change = metric['value']
+            limit, label = 0, f"{change:+.3f}"
+        worse = -change if metric['higher_is_better'] else change
+        flag = ""
+        if worse > limit:
+            flag = "  << REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<45} {base['value']:>12.3f} -> {metric['value']:>12.3f} "
+              f"({label}){flag}")
+    for name in sorted(set(base_metrics) - set(current['metrics'])):
+        print(f"  {name:<45} missing from this run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LinkedBench benchmark suite")
+    parser.add_argument('--sizes', default='10k,1m',
+                        help=f"database sizes for the query benchmarks ({','.join(SIZES)})")
+    parser.add_argument('--only', default='inserts,queries,pipeline,events,api,dashboard,jitter',
+                        help="comma separated list of benchmark groups")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'linkedbench-bench'),
+                        help="where generated databases are cached between runs")
+    parser.add_argument('--inserts', type=int, default=2_000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', metavar='BASELINE', default=None)
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="relative slowdown flagged as a regression (default 10%%)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(message)s')
+    logging.getLogger('LinkedBench.Benchmark').setLevel(logging.INFO)
+
+    sizes = [s.strip().lower() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+    groups = {g.strip() for g in args.only.split(',')}
+
+    Path(args.data_dir).mkdir(parents=True, exist_ok=True)
+    results = Results()
+    with tempfile.TemporaryDirectory() as workdir:
+        if 'inserts' in groups:
+            bench_inserts(results, workdir, args.inserts)
+        if 'queries' in groups:
+            bench_queries(results, args.data_dir, sizes, args.repeat)
+        if 'pipeline' in groups:
+            bench_pipeline(results, workdir, args.inserts)
+        if 'events' in groups:
+            bench_events(results, args.inserts * 10)
+        if 'api' in groups:
+            bench_api(results, args.data_dir, args.requests)
+        if 'dashboard' in groups:
+            bench_dashboard(results, args.data_dir)
+        if 'jitter' in groups:
+            bench_jitter(results, args.data_dir)
+
+    current = results.to_dict()
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Command channel for LinkedBench
+Remote requests (REST, MQTT) are queued and applied in order by the
+sensor thread, which owns the bench state
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class ModeCommand:
+    """A mode change request waiting to be applied by the owner thread"""
+
+    __slots__ = ('mode', 'source', 'callback', 'done', 'status', 'error',
+                 'submitted', 'applied', 'cancelled', '_claimed', '_lock')
+
+    def __init__(self, mode: int, source: str,
+                 callback: Optional[Callable[['ModeCommand'], Any]] = None):
+        self.mode = mode
+        self.source = source
+        self.callback = callback
+        self.done = threading.Event()
+        self.status: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.submitted = time.perf_counter()
+        self.applied: Optional[float] = None
+        self.cancelled = False
+        self._claimed = False
+        self._lock = threading.Lock()
+
+    def cancel(self) -> bool:
+        """Withdraw the command (e.g. the caller timed out); False if it is already being applied"""
+        with self._lock:
+            if not self._claimed:
+                self.cancelled = True
+            return self.cancelled
+
+    def claim(self) -> bool:
+        """Called by the owner thread before applying; False if the command was cancelled"""
+        with self._lock:
+            if not self.cancelled:
+                self._claimed = True
+            return self._claimed
+
+    @property
+    def rtt_ms(self) -> Optional[float]:
+        """Time from submission until the change was applied"""
+        if self.applied is None:
+            return None
+        return (self.applied - self.submitted) * 1000
+
+
+class RoundTripStats:
+    """Keeps the most recent command round-trip times"""
+
+    def __init__(self, size: int = 256):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.cancelled = 0
+        self.max_ms = 0.0
+
+    def add(self, rtt_ms: float):
+        with self._lock:
+            self._samples.append(rtt_ms)
+            self.count += 1
+            self.max_ms = max(self.max_ms, rtt_ms)
+
+    def add_cancelled(self):
+        """A command withdrawn after its caller timed out (never applied)"""
+        with self._lock:
+            self.cancelled += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+            count, cancelled, max_ms = self.count, self.cancelled, self.max_ms
+
+        if not samples:
+            return {'count': 0, 'cancelled': cancelled}
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 3)
+
+        return {
+            'count': count,
+            'cancelled': cancelled,
+            'last_ms': round(self._samples[-1], 3),
+            'mean_ms': round(sum(samples) / len(samples), 3),
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'max_ms': round(max_ms, 3),
+        }
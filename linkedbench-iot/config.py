@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Configuration loading for LinkedBench (config.ini)
+"""
+
+import configparser
+import logging
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger('LinkedBench.Config')
+
+DEFAULT_CONFIG_PATH = str(Path(__file__).with_name('config.ini'))
+
+
+def load_config(path: Optional[str] = None) -> configparser.ConfigParser:
+    """Read config.ini; missing files or keys fall back to the code defaults"""
+    # Inline comments are used in config.ini files found in the field
+    config = configparser.ConfigParser(inline_comment_prefixes=('#', ';'))
+    path = path or DEFAULT_CONFIG_PATH
+    if not config.read(path):
+        logger.warning(f"Config file {path} not found, using defaults")
+    return config
@@ -7,18 +7,25 @@ Uses SQLite for persistent storage
 import sqlite3
 import json
 import logging
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+from archive import EventArchive, default_archive_path
+from events import as_dict, encode
+
 logger = logging.getLogger('LinkedBench.Database')
 
 
 class EventDatabase:
     """SQLite database for LinkedBench events"""
     
-    def __init__(self, db_path: str = "/var/lib/linkedbench/events.db"):
+    def __init__(self, db_path: str = "/var/lib/linkedbench/events.db",
+                 archive_path: Optional[str] = None):
         self.db_path = db_path
+        # Aged events moved out by archive_old_events (see archive.py)
+        self.archive = EventArchive(archive_path or default_archive_path(db_path))
         
         # Create directory if it doesn't exist
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
@@ -81,29 +88,57 @@ class EventDatabase:
         """Save an event to the database"""
         try:
             cursor = self.conn.cursor()
+            data = as_dict(event)
             
             cursor.execute("""
                 INSERT INTO events (bench_id, event_type, mode, mode_name, timestamp, data)
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (
+                data.get('bench_id'),
+                data.get('event_type'),
+                data.get('mode'),
+                data.get('mode_name'),
+                data.get('timestamp'),
+                encode(event)
+            ))
+            
+            self.conn.commit()
+            event_id = cursor.lastrowid
+            
+            logger.debug("Event saved with ID %s", event_id)
+            return event_id
+            
+        except Exception as e:
+            logger.error("Failed to save event: %s", e, exc_info=True)
+            self.conn.rollback()
+            return -1
+    
+    def save_events(self, events: List[Dict[str, Any]]) -> int:
+        """Save several events in a single transaction"""
+        try:
+            cursor = self.conn.cursor()
+            
+            cursor.executemany("""
+                INSERT INTO events (bench_id, event_type, mode, mode_name, timestamp, data)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(
                 event.get('bench_id'),
                 event.get('event_type'),
                 event.get('mode'),
                 event.get('mode_name'),
                 event.get('timestamp'),
-                json.dumps(event)
-            ))
+                encode(event)
+            ) for event in events])
             
             self.conn.commit()
-            event_id = cursor.lastrowid
             
-            logger.debug(f"Event saved with ID {event_id}")
-            return event_id
+            logger.debug("Saved batch of %d events", len(events))
+            return len(events)
             
         except Exception as e:
-            logger.error(f"Failed to save event: {e}", exc_info=True)
+            logger.error("Failed to save events: %s", e, exc_info=True)
             self.conn.rollback()
-            return -1
+            return 0
     
     def get_events(self, bench_id: Optional[str] = None, 
                    limit: int = 100, 
@@ -115,6 +150,7 @@ class EventDatabase:
             
             query = "SELECT * FROM events WHERE 1=1"
             params = []
+            query, params = self._not_archived(query, params)
             
             if bench_id:
                 query += " AND bench_id = ?"
@@ -124,28 +160,125 @@ class EventDatabase:
                 query += " AND event_type = ?"
                 params.append(event_type)
             
-            query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
+            cursor.execute(query + " ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+                           params + [limit, offset])
+            events = [self._row_to_event(row) for row in cursor.fetchall()]
+            
+            # Page reaches past the live table: continue into the archive,
+            # which only holds events older than the live ones
+            if len(events) < limit and self.archive.chunks():
+                archive_offset = 0
+                if not events and offset:
+                    cursor.execute(query.replace("SELECT *", "SELECT COUNT(*)", 1), params)
+                    archive_offset = max(0, offset - cursor.fetchone()[0])
+                events += self.archive.get_events(bench_id=bench_id,
+                                                  limit=limit - len(events),
+                                                  offset=archive_offset,
+                                                  event_type=event_type)
+            
+            return events
+            
+        except Exception as e:
+            logger.error("Failed to retrieve events: %s", e)
+            return []
+    
+    def get_events_after(self, after: Optional[Tuple[str, int]] = None,
+                         limit: int = 1000,
+                         since: Optional[str] = None,
+                         until: Optional[str] = None,
+                         event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Events in ascending (timestamp, id) order, starting after the
+        `after` cursor. Keyset pagination, so deep pages stay cheap.
+        """
+        try:
+            cursor = self.conn.cursor()
+            
+            query = "SELECT * FROM events WHERE 1=1"
+            params = []
+            query, params = self._not_archived(query, params)
+            
+            if since:
+                query += " AND timestamp >= ?"
+                params.append(since)
+            
+            if until:
+                query += " AND timestamp < ?"
+                params.append(until)
+            
+            if event_type:
+                query += " AND event_type = ?"
+                params.append(event_type)
+            
+            if after:
+                query += " AND (timestamp > ? OR (timestamp = ? AND id > ?))"
+                params.extend([after[0], after[0], after[1]])
+            
+            query += " ORDER BY timestamp, id LIMIT ?"
+            params.append(limit)
             
             cursor.execute(query, params)
-            rows = cursor.fetchall()
-            
-            events = []
-            for row in rows:
-                event = dict(row)
-                if event['data']:
-                    try:
-                        event['data'] = json.loads(event['data'])
-                    except:
-                        pass
-                events.append(event)
+            events = [self._row_to_event(row) for row in cursor.fetchall()]
+            
+            if self.archive.chunks():
+                archived = self.archive.get_events_after(after=after, limit=limit, since=since,
+                                                         until=until, event_type=event_type)
+                if archived:
+                    events = sorted(archived + events,
+                                    key=lambda e: (e['timestamp'], e['id']))[:limit]
             
             return events
             
         except Exception as e:
-            logger.error(f"Failed to retrieve events: {e}")
+            logger.error("Failed to retrieve events: %s", e)
             return []
     
+    def get_bench_ranges(self) -> Dict[str, Tuple[str, str]]:
+        """
+        Benches that have events in this database or its archive, with
+        their (first, last) timestamps
+        """
+        try:
+            ranges = self.archive.bench_ranges()
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT bench_id, MIN(timestamp) AS first, MAX(timestamp) AS last
+                FROM events GROUP BY bench_id
+            """)
+            for row in cursor.fetchall():
+                first, last = row['first'], row['last']
+                if row['bench_id'] in ranges:
+                    first = min(first, ranges[row['bench_id']][0])
+                    last = max(last, ranges[row['bench_id']][1])
+                ranges[row['bench_id']] = (first, last)
+            return ranges
+        except Exception as e:
+            logger.error(f"Failed to get bench ranges: {e}")
+            return {}
+    
+    def _not_archived(self, query: str, params: List[Any]) -> Tuple[str, List[Any]]:
+        """
+        Hide live rows that the last archival run already wrote to the
+        archive but did not get to delete (interrupted run), so they are
+        not counted twice until the next run removes them
+        """
+        run = self.archive.last_run()
+        if not run:
+            return query, params
+        query += " AND NOT (id <= ? AND timestamp >= ? AND timestamp <= ?)"
+        return query, params + [run[0]['run_max_id'],
+                                min(c['start'] for c in run), max(c['end'] for c in run)]
+    
+    @staticmethod
+    def _row_to_event(row) -> Dict[str, Any]:
+        event = dict(row)
+        if event['data']:
+            try:
+                event['data'] = json.loads(event['data'])
+            except:
+                pass
+        return event
+    
     def get_event_by_id(self, event_id: int) -> Optional[Dict[str, Any]]:
         """Get a single event by ID"""
         try:
@@ -154,15 +287,9 @@ class EventDatabase:
             row = cursor.fetchone()
             
             if row:
-                event = dict(row)
-                if event['data']:
-                    try:
-                        event['data'] = json.loads(event['data'])
-                    except:
-                        pass
-                return event
+                return self._row_to_event(row)
             
-            return None
+            return self.archive.get_event(event_id)
             
         except Exception as e:
             logger.error(f"Failed to get event: {e}")
@@ -174,11 +301,10 @@ class EventDatabase:
         try:
             cursor = self.conn.cursor()
             
-            query_filter = ""
-            params = []
+            query_filter, params = self._not_archived("", [])
             
             if bench_id:
-                query_filter = "AND bench_id = ?"
+                query_filter += " AND bench_id = ?"
                 params.append(bench_id)
             
             # Total events
@@ -211,6 +337,15 @@ class EventDatabase:
             """, params)
             mode_distribution = {row['mode_name']: row['count'] for row in cursor.fetchall()}
             
+            # Window reaching back into the archive
+            if self.archive.chunks():
+                cursor.execute(f"SELECT datetime('now', '-{days} days') AS since")
+                since = cursor.fetchone()['since'].replace(' ', 'T')
+                archived = self.archive.statistics(since, bench_id=bench_id)
+                events_by_type = dict(archived['events_by_type'] + Counter(events_by_type))
+                mode_distribution = dict(archived['mode_distribution'] + Counter(mode_distribution))
+                total_events += sum(archived['events_by_type'].values())
+            
             return {
                 'total_events': total_events,
                 'events_by_type': events_by_type,
@@ -242,6 +377,83 @@ class EventDatabase:
             self.conn.rollback()
             return 0
     
+    def archive_old_events(self, days: int = 30, page: int = 5000) -> int:
+        """
+        Move events older than `days` days to the archive, one chunk per
+        day. Each chunk is written and found again in the index before its
+        rows are deleted, so an interrupted run never loses events. Rows
+        archived but not yet deleted are hidden from queries and dropped by
+        the next run.
+        """
+        try:
+            cursor = self.conn.cursor()
+            
+            for chunk in self.archive.last_run():
+                self._delete_archived(chunk)
+            
+            cursor.execute(f"SELECT datetime('now', '-{days} days') AS cutoff")
+            cutoff = cursor.fetchone()['cutoff'].replace(' ', 'T')
+            # Ids are AUTOINCREMENT: rows inserted during the run get larger ones
+            cursor.execute("SELECT MAX(id) AS max_id FROM events")
+            run_max_id = cursor.fetchone()['max_id'] or 0
+            
+            moved = 0
+            day_rows: List[Dict[str, Any]] = []
+            after = None
+            while True:
+                # Short read transactions, the bench keeps writing meanwhile
+                query = "SELECT * FROM events WHERE id <= ? AND timestamp < ?"
+                params = [run_max_id, cutoff]
+                if after:
+                    query += " AND (timestamp > ? OR (timestamp = ? AND id > ?))"
+                    params.extend([after[0], after[0], after[1]])
+                cursor.execute(query + " ORDER BY timestamp, id LIMIT ?", params + [page])
+                rows = [self._row_to_event(row) for row in cursor.fetchall()]
+                
+                for event in rows:
+                    if day_rows and event['timestamp'][:10] != day_rows[0]['timestamp'][:10]:
+                        moved += self._archive_chunk(day_rows, run_max_id)
+                        day_rows = []
+                    day_rows.append(event)
+                
+                if len(rows) < page:
+                    break
+                after = (rows[-1]['timestamp'], rows[-1]['id'])
+            
+            if day_rows:
+                moved += self._archive_chunk(day_rows, run_max_id)
+            
+            logger.info(f"Archived {moved} events older than {days} days")
+            return moved
+            
+        except Exception as e:
+            logger.error(f"Failed to archive events: {e}")
+            self.conn.rollback()
+            return 0
+    
+    def _archive_chunk(self, rows: List[Dict[str, Any]], run_max_id: int) -> int:
+        chunk = self.archive.write_chunk(rows, run_max_id)
+        # Rows are only deleted once the archive can find them again
+        if not self.archive.is_indexed(chunk):
+            raise RuntimeError(f"archive chunk {chunk['file']} missing from the index")
+        self._delete_archived(chunk)
+        return chunk['count']
+    
+    def _delete_archived(self, chunk: Dict[str, Any], batch: int = 10000):
+        """Delete the live rows covered by an archive chunk, in small transactions"""
+        cursor = self.conn.cursor()
+        while True:
+            cursor.execute("""
+                DELETE FROM events WHERE id IN (
+                    SELECT id FROM events
+                    WHERE id <= ? AND timestamp >= ? AND timestamp <= ?
+                    LIMIT ?
+                )
+            """, (chunk['run_max_id'], chunk['start'], chunk['end'], batch))
+            self.conn.commit()
+            if cursor.rowcount < batch:
+                break
+    
     def close(self):
         """Close database connection"""
         if self.conn:
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Event record for LinkedBench
+
+Events go through the queue to SQLite, MQTT and the in-memory history.
+The record is encoded to JSON once, on first use, and every sink reuses
+that encoding. The timestamp is taken as epoch seconds when the event
+happens and only formatted to ISO 8601 when something asks for it.
+
+Events are treated as immutable once created: the dict form and the
+encodings are cached and shared by every sink.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+
+class Event:
+    """One bench event (occupation, vacation, mode_change)"""
+
+    __slots__ = ('event_type', 'bench_id', 'seats', 'mode', 'mode_name', 'created',
+                 '_timestamp', '_dict', '_json', '_payload')
+
+    def __init__(self, event_type: str, bench_id: str, created: float,
+                 seats: Optional[int] = None, mode: Optional[int] = None,
+                 mode_name: Optional[str] = None):
+        self.event_type = event_type
+        self.bench_id = bench_id
+        self.seats = seats
+        self.mode = mode
+        self.mode_name = mode_name
+        self.created = created
+        self._timestamp = None
+        self._dict = None
+        self._json = None
+        self._payload = None
+
+    def __repr__(self):
+        return f"Event({self.event_type!r}, {self.bench_id!r}, {self.timestamp!r})"
+
+    @property
+    def timestamp(self) -> str:
+        if self._timestamp is None:
+            self._timestamp = datetime.fromtimestamp(self.created).isoformat()
+        return self._timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict form, built once (same keys and order as the old event dicts)"""
+        if self._dict is None:
+            data = {'event_type': self.event_type, 'bench_id': self.bench_id}
+            if self.seats is not None:
+                data['seats'] = self.seats
+            if self.mode is not None:
+                data['mode'] = self.mode
+                data['mode_name'] = self.mode_name
+            data['timestamp'] = self.timestamp
+            self._dict = data
+        return self._dict
+
+    @property
+    def json(self) -> str:
+        """JSON text, encoded once (SQLite data column)"""
+        if self._json is None:
+            self._json = json.dumps(self.to_dict())
+        return self._json
+
+    @property
+    def payload(self) -> bytes:
+        """UTF-8 JSON, encoded once (MQTT payload)"""
+        if self._payload is None:
+            self._payload = self.json.encode('utf-8')
+        return self._payload
+
+    # Read access like the old dicts, for sinks that also take plain dicts
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.to_dict().get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.to_dict()[key]
+
+
+def encode(event: Union[Event, Dict[str, Any]]) -> str:
+    """JSON text of an Event (cached) or of a plain dict"""
+    if isinstance(event, Event):
+        return event.json
+    return json.dumps(event)
+
+
+def as_dict(event: Union[Event, Dict[str, Any]]) -> Dict[str, Any]:
+    if isinstance(event, Event):
+        return event.to_dict()
+    return event
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Fleet queries over many per-bench events.db files
+
+Each database is queried with EventDatabase in a process pool and the
+partial results are merged in the parent:
+- statistics: summed aggregates, per bench and for the whole fleet
+  (a bench found in several files is summed only when the files cover
+  separate periods; overlapping copies count once, see statistics())
+- top: top-N benches by number of events (optionally of one type)
+- events: newest events across the fleet (top-N merge)
+- stream: every event in time order (streaming k-way merge)
+
+    python3 fleet_query.py stats /data/fleet/*.db --days 7
+    python3 fleet_query.py top /data/fleet/*.db --n 5 --type occupation
+    python3 fleet_query.py events /data/fleet/*.db --limit 20
+    python3 fleet_query.py stream /data/fleet/*.db --since 2025-01-01 > all.jsonl
+"""
+
+import heapq
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from database import EventDatabase
+
+logger = logging.getLogger('LinkedBench.Fleet')
+
+STREAM_PAGE_SIZE = 5000
+
+
+# ================= WORKERS (run in the pool) =================
+
+def _init_worker():
+    # One "Database initialized" line per file and process is just noise
+    logging.getLogger('LinkedBench').setLevel(logging.WARNING)
+
+
+def _file_statistics(path: str, days: int) -> Dict[str, Tuple[Dict[str, Any], Tuple[str, str]]]:
+    """{bench_id: (statistics, (first, last) timestamp)}"""
+    db = EventDatabase(path)
+    try:
+        return {bench_id: (db.get_statistics(bench_id=bench_id, days=days), span)
+                for bench_id, span in db.get_bench_ranges().items()}
+    finally:
+        db.close()
+
+
+def _file_events(path: str, limit: int, event_type: Optional[str]) -> List[Dict[str, Any]]:
+    db = EventDatabase(path)
+    try:
+        return db.get_events(limit=limit, event_type=event_type)
+    finally:
+        db.close()
+
+
+def _file_page(path: str, after, limit: int, since: Optional[str],
+               until: Optional[str], event_type: Optional[str]) -> List[Dict[str, Any]]:
+    db = EventDatabase(path)
+    try:
+        return db.get_events_after(after=after, limit=limit, since=since,
+                                   until=until, event_type=event_type)
+    finally:
+        db.close()
+
+
+# ================= MERGING =================
+
+def merge_statistics(per_bench: Dict[str, Dict[str, Any]], days: int) -> Dict[str, Any]:
+    """Sum per-bench get_statistics results into fleet totals"""
+    by_type = Counter()
+    modes = Counter()
+    total = 0
+    for stats in per_bench.values():
+        total += stats.get('total_events', 0)
+        by_type.update(stats.get('events_by_type', {}))
+        modes.update(stats.get('mode_distribution', {}))
+    return {
+        'total_events': total,
+        'events_by_type': dict(by_type),
+        'mode_distribution': dict(modes),
+        'period_days': days,
+        'benches': len(per_bench),
+    }
+
+
+def unique_events(events: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Drop repeats of the same event (bench_id, id) coming from several copies
+    of a database. Input in timestamp order, so repeats share a timestamp.
+    """
+    timestamp = None
+    seen = set()
+    for event in events:
+        if event['timestamp'] != timestamp:
+            timestamp = event['timestamp']
+            seen.clear()
+        key = (event['bench_id'], event['id'])
+        if key in seen:
+            continue
+        seen.add(key)
+        yield event
+
+
+class FleetQuery:
+    """Runs EventDatabase queries against many database files in parallel"""
+
+    def __init__(self, paths: List[str], workers: Optional[int] = None):
+        self.paths = list(paths)
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=min(self.workers, max(len(self.paths), 1)),
+                                             initializer=_init_worker)
+        return self._pool
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+    def statistics(self, days: int = 7) -> Dict[str, Any]:
+        """
+        Fleet totals plus the statistics of every bench.
+
+        A bench found in several files is summed when the files cover
+        separate periods (e.g. its SD card was replaced). Files whose periods
+        overlap are copies of the same history taken at different times:
+        summing them would count events twice, so only the copy that reaches
+        furthest is used and the others are reported in 'overlapping'.
+        """
+        per_bench: Dict[str, Dict[str, Any]] = {}
+        spans: Dict[str, Tuple[str, str, str]] = {}    # bench_id -> (first, last, path)
+        overlapping = []
+        results = self.pool.map(_file_statistics, self.paths, [days] * len(self.paths))
+        for path, result in zip(self.paths, results):
+            for bench_id, (stats, (first, last)) in result.items():
+                if bench_id not in per_bench:
+                    per_bench[bench_id] = stats
+                    spans[bench_id] = (first, last, path)
+                    continue
+
+                seen_first, seen_last, seen_path = spans[bench_id]
+                if first <= seen_last and seen_first <= last:
+                    newer = ((last, stats.get('total_events', 0))
+                             > (seen_last, per_bench[bench_id].get('total_events', 0)))
+                    kept, dropped = (path, seen_path) if newer else (seen_path, path)
+                    logger.warning("%s: %s and %s overlap in time, counting only %s",
+                                   bench_id, seen_path, path, kept)
+                    overlapping.append({'bench_id': bench_id, 'kept': kept, 'dropped': dropped})
+                    if newer:
+                        per_bench[bench_id] = stats
+                        spans[bench_id] = (first, last, path)
+                    continue
+
+                merged = merge_statistics({0: per_bench[bench_id], 1: stats}, days)
+                merged.pop('benches')
+                per_bench[bench_id] = merged
+                spans[bench_id] = (min(first, seen_first), max(last, seen_last), seen_path)
+        fleet = merge_statistics(per_bench, days)
+        fleet['overlapping'] = overlapping
+        fleet['per_bench'] = per_bench
+        return fleet
+
+    def top_benches(self, n: int = 10, days: int = 7,
+                    event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The n busiest benches, by total events or by events of one type"""
+        per_bench = self.statistics(days)['per_bench']
+
+        def score(item):
+            _, stats = item
+            if event_type:
+                return stats.get('events_by_type', {}).get(event_type, 0)
+            return stats.get('total_events', 0)
+
+        return [{'bench_id': bench_id, 'count': score((bench_id, stats))}
+                for bench_id, stats in heapq.nlargest(n, per_bench.items(), key=score)]
+
+    def events(self, limit: int = 100, offset: int = 0,
+               event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Newest events of the whole fleet, same ordering as get_events"""
+        wanted = offset + limit
+        partials = self.pool.map(_file_events, self.paths,
+                                 [wanted] * len(self.paths),
+                                 [event_type] * len(self.paths))
+        # Each partial list is already newest first
+        merged = unique_events(heapq.merge(*partials, key=lambda e: e['timestamp'], reverse=True))
+        result = []
+        for i, event in enumerate(merged):
+            if i >= wanted:
+                break
+            if i >= offset:
+                result.append(event)
+        return result
+
+    def _iter_file(self, path: str, since, until, event_type) -> Iterator[Dict[str, Any]]:
+        """Events of one file in time order, fetching the next page ahead"""
+        args = (STREAM_PAGE_SIZE, since, until, event_type)
+        future = self.pool.submit(_file_page, path, None, *args)
+        while True:
+            page = future.result()
+            if not page:
+                return
+            last = page[-1]
+            if len(page) == STREAM_PAGE_SIZE:
+                future = self.pool.submit(_file_page, path, (last['timestamp'], last['id']), *args)
+            yield from page
+            if len(page) < STREAM_PAGE_SIZE:
+                return
+
+    def stream(self, since: Optional[str] = None, until: Optional[str] = None,
+               event_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Every event of the fleet in ascending time order, lazily"""
+        iterators = [self._iter_file(path, since, until, event_type) for path in self.paths]
+        return unique_events(heapq.merge(*iterators, key=lambda e: e['timestamp']))
+
+
+def main():
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="Query many LinkedBench databases at once")
+    parser.add_argument('command', choices=['stats', 'top', 'events', 'stream'])
+    parser.add_argument('databases', nargs='+')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--n', type=int, default=10, help="number of benches for 'top'")
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--offset', type=int, default=0)
+    parser.add_argument('--type', dest='event_type', default=None)
+    parser.add_argument('--since', default=None, help="ISO timestamp (stream)")
+    parser.add_argument('--until', default=None, help="ISO timestamp (stream)")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(message)s')
+
+    missing = [p for p in args.databases if not os.path.exists(p)]
+    if missing:
+        parser.error(f"database not found: {', '.join(missing)}")
+
+    with FleetQuery(args.databases, workers=args.workers) as fleet:
+        if args.command == 'stats':
+            result = fleet.statistics(days=args.days)
+        elif args.command == 'top':
+            result = fleet.top_benches(n=args.n, days=args.days, event_type=args.event_type)
+        elif args.command == 'events':
+            result = fleet.events(limit=args.limit, offset=args.offset,
+                                  event_type=args.event_type)
+        else:
+            # JSON lines, written as the merge produces them
+            for event in fleet.stream(args.since, args.until, args.event_type):
+                sys.stdout.write(json.dumps(event) + '\n')
+            return
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -50,12 +50,12 @@ pip3 install --break-system-packages -r requirements.txt
 # Create directories
 echo "[5/8] Creating directories..."
 mkdir -p /var/lib/linkedbench
-mkdir -p /var/log
 chown $ACTUAL_USER:$ACTUAL_USER /var/lib/linkedbench
 
-# Create log file
-touch /var/log/linkedbench.log
-chown $ACTUAL_USER:$ACTUAL_USER /var/log/linkedbench.log
+# Log directory owned by the service user: rotation creates and removes
+# files next to the log, which /var/log itself does not allow
+mkdir -p /var/log/linkedbench
+chown $ACTUAL_USER:$ACTUAL_USER /var/log/linkedbench
 
 # Copy files to /opt/linkedbench
 echo "[6/8] Installing application files..."
@@ -83,8 +83,9 @@ WorkingDirectory=$INSTALL_DIR
 ExecStart=/usr/bin/python3 $INSTALL_DIR/linkedbench.py
 Restart=always
 RestartSec=10
-StandardOutput=append:/var/log/linkedbench.log
-StandardError=append:/var/log/linkedbench.log
+# The application writes and rotates /var/log/linkedbench/linkedbench.log itself
+StandardOutput=journal
+StandardError=journal
 
 [Install]
 WantedBy=multi-user.target
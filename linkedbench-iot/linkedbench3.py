@@ -5,9 +5,14 @@ LinkedBench IoT System - VERSION FINAL CORREGIDA + EVENTOS
 - Historial de eventos ahora se actualiza correctamente
 """
 
-import RPi.GPIO as GPIO
 import time
+
+# Referencia para el informe de arranque (antes de cualquier import pesado)
+PROCESS_START = time.monotonic()
+
+import RPi.GPIO as GPIO
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 from threading import Thread, Lock
 import queue
@@ -15,8 +20,16 @@ import signal
 
 from sensors2 import PressurePlate, ModeButton, BlinkingLED, Buzzer, I2CDisplay
 from mqtt_client import MQTTPublisher
-from rest_api import start_api_server
 from database import EventDatabase
+from events import Event
+from commands import ModeCommand, RoundTripStats
+from recent_events import RecentEvents
+from profiling import install_signal_handler
+from occupancy import OccupancyFilter
+from scheduler import DeadlineScheduler
+from config import load_config
+from log_setup import setup_logging
+# rest_api (Flask) se importa bajo demanda en _load_api
 
 # --- PINES ---
 PIN_PRESSURE_1 = 18
@@ -40,18 +53,112 @@ MODE_NAMES = {
     MODE_STUDY_BUDDY: "Study buddy"
 }
 
+# Modos que se pueden elegir (botón o remoto) con un solo usuario
+USER_MODES = (MODE_AVAILABLE, MODE_STUDYING, MODE_CHAT)
+
+# Tiempo máximo de espera de un comando remoto (s)
+COMMAND_TIMEOUT = 2.0
+
+# Eventos recientes que se sirven desde memoria
+RECENT_EVENTS_SIZE = 256
+# Frecuencias de muestreo por defecto (Hz), configurables en [sampling]
+SEAT_RATE = 10.0
+BUTTON_RATE = 10.0
+
 MODE_PATTERNS = {
     MODE_STUDYING: 'FAST',
     MODE_CHAT: 'MEDIUM'
 }
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+# La configuración del logging (cola + fichero rotativo) se hace en main()
 logger = logging.getLogger('LinkedBench')
 
 
+def sampling_rates(config=None):
+    """(seat_rate, button_rate) en Hz, de la sección [sampling] (también para trazas)"""
+    if config is None:
+        return SEAT_RATE, BUTTON_RATE
+    return (config.getfloat('sampling', 'seat_rate', fallback=SEAT_RATE),
+            config.getfloat('sampling', 'button_rate', fallback=BUTTON_RATE))
+
+
+class StartupTimer:
+    """
+    Mide cada fase del arranque respecto al inicio del proceso
+    y genera un informe para el log
+    """
+    def __init__(self, t0=PROCESS_START):
+        self.t0 = t0
+        self.phases = []
+        self._lock = Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self.phases.append((name, start - self.t0, end - start))
+
+    def mark(self, name):
+        """Registra un hito instantáneo (p.ej. 'sensores activos')"""
+        with self._lock:
+            self.phases.append((name, time.monotonic() - self.t0, 0.0))
+
+    def report(self):
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+        lines = [f"  {at * 1000:8.1f} ms  +{took * 1000:7.1f} ms  {name}"
+                 for name, at, took in phases]
+        logger.info("Informe de arranque:\n" + "\n".join(lines))
+
+
 class LinkedBenchSystem:
-    def __init__(self, bench_id="BENCH_001"):
+    def __init__(self, bench_id="BENCH_001", trace_path=None, config=None):
+        occupancy = OccupancyFilter.from_config(config) if config is not None else None
+        self._init_state(bench_id, occupancy)
+        self.startup = StartupTimer()
+
+        # Sólo lo imprescindible para sentir y dar feedback local.
+        # Display, base de datos, MQTT y API se inician en segundo plano
+        with self.startup.phase("gpio"):
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setwarnings(False)
+
+            self.pressure1 = PressurePlate(PIN_PRESSURE_1, "Seat1")
+            self.pressure2 = PressurePlate(PIN_PRESSURE_2, "Seat2")
+            self.mode_button = ModeButton(PIN_MODE_BUTTON)
+            self.led = BlinkingLED(PIN_RGB_LED)
+            self.buzzer = Buzzer(PIN_BUZZER)
+
+        self.display = None
+        self.db = None
+        self.mqtt = MQTTPublisher(bench_id, on_command=self._on_mqtt_command)
+
+        # Muestreo con plazos absolutos (ver scheduler.py)
+        if config is not None:
+            self.scheduler = DeadlineScheduler.from_config(config)
+        else:
+            self.scheduler = DeadlineScheduler()
+        seat_rate, button_rate = sampling_rates(config)
+        self.scheduler.add("seats", seat_rate, self._seat_step)
+        self.scheduler.add("button", button_rate, self._button_step)
+
+        # Grabación opcional de muestras GPIO en bruto
+        self.recorder = None
+        if trace_path:
+            from sensor_trace import TraceRecorder
+            self.recorder = TraceRecorder(trace_path)
+            for sensor in (self.pressure1, self.pressure2, self.mode_button):
+                sensor.recorder = self.recorder
+            logger.info(f"Grabando traza de sensores en {trace_path}")
+
+    def _init_state(self, bench_id, occupancy=None):
+        """Estado de la máquina de modos (compartido con la reproducción de trazas)"""
         self.bench_id = bench_id
+        self.occupancy = occupancy or OccupancyFilter()
         self.current_mode = MODE_EMPTY
         self.occupied = False
         self.seat1_active = False
@@ -59,50 +166,91 @@ class LinkedBenchSystem:
         self.lock = Lock()
         self.running = False
         self.event_queue = queue.Queue()
-
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setwarnings(False)
-
-        self.pressure1 = PressurePlate(PIN_PRESSURE_1, "Seat1")
-        self.pressure2 = PressurePlate(PIN_PRESSURE_2, "Seat2")
-        self.mode_button = ModeButton(PIN_MODE_BUTTON)
-        self.led = BlinkingLED(PIN_RGB_LED)
-        self.buzzer = Buzzer(PIN_BUZZER)
-
-        try:
-            self.display = I2CDisplay()
-        except:
-            self.display = None
-
-        self.db = EventDatabase()
-        self.mqtt = MQTTPublisher(bench_id)
+        self.command_queue = queue.Queue()
+        self.command_stats = RoundTripStats()
+        self.recent_events = RecentEvents(RECENT_EVENTS_SIZE)
+        self._last_occupied = False
+        self._last_button = False
 
     def start(self):
         self.running = True
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
+        # kill -USR1 <pid>: volcado de pilas + perfil (ver profiling.py)
+        install_signal_handler()
 
-        Thread(target=self._sensor_loop, daemon=True).start()
-        Thread(target=self._event_processor, daemon=True).start()
-        Thread(target=lambda: start_api_server(self), daemon=True).start()
-
-        self._update_display()
+        Thread(target=self._sensor_loop, name="sensor-loop", daemon=True).start()
         self._update_led()
+        self.startup.mark("sensores activos")
+
+        Thread(target=self._deferred_startup, name="startup", daemon=True).start()
+
         self.buzzer.beep_startup()
-        logger.info("SISTEMA LISTO")
 
         while self.running:
             time.sleep(1)
 
         self.stop()
 
+    def _deferred_startup(self):
+        """Arranque de los componentes lentos, fuera del camino crítico"""
+        # Cada fase falla por separado: sin base de datos siguen MQTT y la API
+        with self.startup.phase("base de datos"):
+            try:
+                self.db = EventDatabase()
+                self.recent_events.seed(self.db.get_events(bench_id=self.bench_id,
+                                                           limit=RECENT_EVENTS_SIZE + 1))
+            except Exception as e:
+                logger.error(f"Base de datos no disponible, los eventos no se guardarán: {e}",
+                             exc_info=True)
+        # Los eventos generados hasta ahora esperan en la cola
+        Thread(target=self._event_processor, name="event-processor", daemon=True).start()
+
+        with self.startup.phase("mqtt (conexión asíncrona)"):
+            try:
+                self.mqtt.start()
+            except Exception as e:
+                logger.error(f"MQTT no disponible: {e}", exc_info=True)
+
+        with self.startup.phase("display"):
+            try:
+                display = I2CDisplay()
+            except:
+                display = None
+            self.display = display
+            try:
+                self._update_display()
+            except Exception as e:
+                logger.error(f"Error actualizando el display: {e}")
+
+        with self.startup.phase("api (import flask)"):
+            start_api_server = self._load_api()
+        if start_api_server:
+            Thread(target=lambda: start_api_server(self), name="api", daemon=True).start()
+
+        logger.info("SISTEMA LISTO")
+        self.startup.report()
+        # Lo creado en el arranque vive hasta el final: fuera del GC
+        self.scheduler.freeze()
+
+    def _load_api(self):
+        try:
+            from rest_api import start_api_server
+            return start_api_server
+        except Exception as e:
+            logger.error(f"API REST no disponible: {e}")
+            return None
+
     def stop(self):
         self.running = False
         if self.display:
             self.display.clear()
         self.led.cleanup()
         self.mqtt.disconnect()
-        self.db.close()
+        if self.recorder:
+            self.recorder.close()
+        if self.db:
+            self.db.close()
         GPIO.cleanup()
 
     def _signal_handler(self, *_):
@@ -111,95 +259,215 @@ class LinkedBenchSystem:
     # ================= EVENTOS =================
 
     def _handle_occupation(self, seats):
-        event = {
-            'event_type': 'occupation',
-            'bench_id': self.bench_id,
-            'seats': seats,
-            'mode': self.current_mode,
-            'mode_name': MODE_NAMES[self.current_mode],
-            'timestamp': datetime.now().isoformat()
-        }
+        event = Event('occupation', self.bench_id, self._clock(), seats=seats,
+                      mode=self.current_mode, mode_name=MODE_NAMES[self.current_mode])
         self.event_queue.put(event)
         logger.info("Evento: ocupación")
 
-    def _handle_vacation(self):
-        event = {
-            'event_type': 'vacation',
-            'bench_id': self.bench_id,
-            'timestamp': datetime.now().isoformat()
-        }
+    def _handle_vacation(self, created=None):
+        event = Event('vacation', self.bench_id,
+                      created if created is not None else self._clock())
         self.event_queue.put(event)
         logger.info("Evento: liberación")
 
     def _handle_mode_change(self):
-        event = {
-            'event_type': 'mode_change',
-            'bench_id': self.bench_id,
-            'mode': self.current_mode,
-            'mode_name': MODE_NAMES[self.current_mode],
-            'timestamp': datetime.now().isoformat()
-        }
+        event = Event('mode_change', self.bench_id, self._clock(),
+                      mode=self.current_mode, mode_name=MODE_NAMES[self.current_mode])
         self.event_queue.put(event)
 
+    def _clock(self):
+        # Segundos epoch; el texto ISO se genera solo si alguien lo pide
+        return time.time()
+
     # ================= SENSORES =================
 
     def _sensor_loop(self):
-        last_occupied = False
-        last_button = False
-
-        while self.running:
-            p1 = self.pressure1.is_pressed()
-            p2 = self.pressure2.is_pressed()
-            seats = int(p1) + int(p2)
+        # Entre plazos, en vez de dormir, atendemos los comandos remotos
+        self.scheduler.run(lambda: self.running, self._process_commands)
+
+    def _seat_step(self):
+        """Muestreo de los asientos"""
+        now = self.pressure1.clock()
+        # Estado estable de cada asiento (histéresis, ver occupancy.py)
+        p1, p2 = self.occupancy.update(self.pressure1.is_pressed(),
+                                       self.pressure2.is_pressed(), now)
+        seats = int(p1) + int(p2)
+        changed = False
+
+        with self.lock:
+            # Liberación retenida cuya ventana de fusión ya pasó
+            vacated = self.occupancy.expired_vacation(now)
+            if vacated is not None:
+                self._handle_vacation(vacated)
 
             if p1 != self.seat1_active or p2 != self.seat2_active:
+                changed = True
                 self.seat1_active = p1
                 self.seat2_active = p2
 
                 if seats == 0:
                     self.occupied = False
-                    self.current_mode = MODE_EMPTY
-                    if last_occupied:
+                    if self._last_occupied and not self.occupancy.hold_vacation(
+                            now, self._clock(), self.current_mode):
                         self._handle_vacation()
+                    self.current_mode = MODE_EMPTY
 
                 else:
                     self.occupied = True
-                    if not last_occupied:
-                        self.current_mode = MODE_AVAILABLE if seats == 1 else MODE_STUDY_BUDDY
-                        self._handle_occupation(seats)
+                    if not self._last_occupied:
+                        previous = self.occupancy.cancel_vacation()
+                        if previous is not None:
+                            # Se vuelve a sentar dentro de la ventana: misma sesión
+                            self.current_mode = MODE_STUDY_BUDDY if seats == 2 else previous
+                            logger.debug("Liberación y ocupación fusionadas")
+                        else:
+                            self.current_mode = MODE_AVAILABLE if seats == 1 else MODE_STUDY_BUDDY
+                            self._handle_occupation(seats)
                     elif seats == 2:
                         self.current_mode = MODE_STUDY_BUDDY
 
-                self._update_display()
-                self._update_led()
-
-            last_occupied = self.occupied
+            self._last_occupied = self.occupied
 
-            # Botón de modo
-            pressed = self.mode_button.is_pressed()
-            if pressed and not last_button:
-                self._cycle_mode()
-            last_button = pressed
+        if changed:
+            self._update_display()
+            self._update_led()
 
-            time.sleep(0.1)
+    def _button_step(self):
+        """Muestreo del botón de modo"""
+        pressed = self.mode_button.is_pressed()
+        if pressed and not self._last_button:
+            self._cycle_mode()
+        self._last_button = pressed
 
     def _cycle_mode(self):
-        if int(self.seat1_active) + int(self.seat2_active) != 1:
+        with self.lock:
+            allowed = int(self.seat1_active) + int(self.seat2_active) == 1
+            if allowed:
+                if self.current_mode == MODE_AVAILABLE:
+                    self.current_mode = MODE_STUDYING
+                elif self.current_mode == MODE_STUDYING:
+                    self.current_mode = MODE_CHAT
+                elif self.current_mode == MODE_CHAT:
+                    self.current_mode = MODE_AVAILABLE
+                self._handle_mode_change()
+
+        if not allowed:
             self.buzzer.beep_error()
             return
 
-        if self.current_mode == MODE_AVAILABLE:
-            self.current_mode = MODE_STUDYING
-        elif self.current_mode == MODE_STUDYING:
-            self.current_mode = MODE_CHAT
-        elif self.current_mode == MODE_CHAT:
-            self.current_mode = MODE_AVAILABLE
-
-        self._handle_mode_change()
         self._update_display()
         self._update_led()
         self.buzzer.beep_confirm()
 
+    # ================= COMANDOS =================
+
+    def submit_command(self, mode, source, callback=None):
+        """Encola un cambio de modo; lo aplica el hilo de sensores"""
+        command = ModeCommand(mode, source, callback)
+        self.command_queue.put(command)
+        return command
+
+    def set_mode(self, mode, source='rest', timeout=COMMAND_TIMEOUT):
+        """
+        Cambia el modo y espera a que se aplique.
+        Lanza ValueError si el cambio no está permitido y
+        TimeoutError si el hilo de sensores no responde a tiempo.
+        """
+        if not self.running:
+            raise RuntimeError("System not running")
+
+        command = self.submit_command(mode, source)
+        if not command.done.wait(timeout):
+            if command.cancel():
+                # Retirado de la cola: el hilo de sensores ya no lo aplicará
+                self.command_stats.add_cancelled()
+                raise TimeoutError(f"Mode change not applied within {timeout}s")
+            # Se está aplicando justo ahora: esperamos el resultado real
+            command.done.wait()
+        if command.error:
+            raise ValueError(command.error)
+
+        status = dict(command.status)
+        status['rtt_ms'] = round(command.rtt_ms, 3)
+        return status
+
+    def get_command_stats(self):
+        return self.command_stats.summary()
+
+    def get_occupancy_stats(self):
+        return self.occupancy.stats()
+
+    def get_sampling_stats(self):
+        return self.scheduler.stats()
+
+    def _process_commands(self, timeout):
+        """Aplica comandos en orden hasta agotar el tiempo del ciclo"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                command = self.command_queue.get(timeout=remaining)
+            except queue.Empty:
+                return
+            self._apply_command(command)
+
+    def _apply_command(self, command):
+        if not command.claim():
+            logger.debug("Comando %s (%s) cancelado, se descarta", command.mode, command.source)
+            return
+        try:
+            self._apply_mode(command.mode)
+        except ValueError as e:
+            command.error = str(e)
+
+        command.status = self.get_status()
+        command.applied = time.perf_counter()
+        self.command_stats.add(command.rtt_ms)
+        command.done.set()
+        logger.debug("Comando %s (%s): %.2f ms", command.mode, command.source, command.rtt_ms)
+
+        if command.callback:
+            try:
+                command.callback(command)
+            except Exception as e:
+                logger.error("Error en callback de comando: %s", e)
+
+    def _apply_mode(self, mode):
+        with self.lock:
+            if mode not in USER_MODES:
+                raise ValueError(f"Mode {mode} cannot be set remotely")
+            if int(self.seat1_active) + int(self.seat2_active) != 1:
+                raise ValueError("Mode can only be changed with exactly one user seated")
+            if mode == self.current_mode:
+                return
+            self.current_mode = mode
+            self._handle_mode_change()
+
+        self._update_display()
+        self._update_led()
+
+    def _on_mqtt_command(self, data):
+        """Comando recibido en linkedbench/{bench_id}/cmd"""
+        try:
+            mode = int(data['mode'])
+        except (KeyError, TypeError, ValueError):
+            self.mqtt.publish_command_result({'id': data.get('id'), 'ok': False,
+                                              'error': 'mode field required'})
+            return
+
+        def reply(command):
+            self.mqtt.publish_command_result({
+                'id': data.get('id'),
+                'ok': command.error is None,
+                'error': command.error,
+                'status': command.status,
+                'rtt_ms': round(command.rtt_ms, 3)
+            })
+
+        self.submit_command(mode, 'mqtt', callback=reply)
+
     # ================= SALIDA =================
 
     def _update_led(self):
@@ -219,25 +487,60 @@ class LinkedBenchSystem:
         while self.running:
             try:
                 event = self.event_queue.get(timeout=1)
-                self.db.save_event(event)
+                if self.db is not None:
+                    event_id = self.db.save_event(event)
+                    if event_id > 0:
+                        self.recent_events.append(event_id, event)
                 self.mqtt.publish_event(event)
             except queue.Empty:
                 pass
 
     # ================= API =================
 
+    def get_events(self, limit=100, offset=0, event_type=None):
+        """Historial de eventos: memoria si es posible, si no SQLite"""
+        events = self.recent_events.lookup(limit, offset, event_type)
+        if events is None:
+            if self.db is None:
+                raise RuntimeError("base de datos no disponible")
+            events = self.db.get_events(bench_id=self.bench_id, limit=limit,
+                                        offset=offset, event_type=event_type)
+        return events
+
     def get_status(self):
-        return {
-            'bench_id': self.bench_id,
-            'occupied': self.occupied,
-            'mode': self.current_mode,
-            'mode_name': MODE_NAMES[self.current_mode],
-            'timestamp': datetime.now().isoformat()
-        }
+        with self.lock:
+            return {
+                'bench_id': self.bench_id,
+                'occupied': self.occupied,
+                'mode': self.current_mode,
+                'mode_name': MODE_NAMES[self.current_mode],
+                'timestamp': datetime.now().isoformat()
+            }
 
 
 def main():
-    LinkedBenchSystem().start()
+    import argparse
+    parser = argparse.ArgumentParser(description="LinkedBench IoT System")
+    parser.add_argument('--bench-id', default="BENCH_001")
+    parser.add_argument('--config', default=None,
+                        help="ruta de config.ini (por defecto, junto al script)")
+    parser.add_argument('--record-trace', metavar='PATH', default=None,
+                        help="graba las muestras GPIO en bruto (ver sensor_trace.py)")
+    parser.add_argument('--multiprocess', action='store_true',
+                        help="sensores, almacenamiento y API en procesos separados")
+    args = parser.parse_args()
+    config = load_config(args.config)
+
+    if args.multiprocess:
+        import process_layout
+        process_layout.run(args.bench_id, trace_path=args.record_trace, config=config)
+        return
+
+    listener = setup_logging(config)
+    try:
+        LinkedBenchSystem(args.bench_id, trace_path=args.record_trace, config=config).start()
+    finally:
+        listener.stop()
 
 
 if __name__ == '__main__':
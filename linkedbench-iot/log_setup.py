@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Logging setup for LinkedBench
+
+Every thread (and worker process) only puts records on a queue; a single
+listener thread does the formatting and the writes, so a slow SD card
+never stalls the sensor loop, the event processor or a request handler.
+
+Settings come from the [logging] section of config.ini.
+"""
+
+import glob
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import time
+
+LOG_FORMAT = '%(asctime)s - %(message)s'
+
+logger = logging.getLogger('LinkedBench.Logging')
+
+
+class RotatingLogHandler(logging.handlers.BaseRotatingHandler):
+    """
+    File handler that rotates on size and on time, whichever comes first.
+    Old files are named <file>.<YYYYmmdd-HHMMSS>[.gz] and pruned to
+    backup_count. Rotation creates and removes files next to the log, so
+    its directory must be writable; if it fails, logging goes on in the
+    current file and rotation is retried at the next interval.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 5 * 1024 * 1024,
+                 interval: float = 86400, backup_count: int = 7, compress: bool = True):
+        super().__init__(filename, 'a', encoding='utf-8', delay=True)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.next_rollover = self._compute_next(time.time())
+        self.rotation_failed = False
+
+    def _compute_next(self, now: float) -> float:
+        if self.interval <= 0:
+            return float('inf')
+        return now - (now % self.interval) + self.interval
+
+    def shouldRollover(self, record) -> bool:
+        if time.time() >= self.next_rollover:
+            return True
+        # After a failed rotation the size stays over the limit: wait for the interval
+        if self.max_bytes > 0 and not self.rotation_failed:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        try:
+            self._rotate()
+        except OSError as e:
+            # Records keep going to the current file (reopened by emit)
+            if not self.rotation_failed:
+                self.rotation_failed = True
+                logger.error(f"Log rotation of {self.baseFilename} failed, "
+                             f"still writing to it: {e}")
+        else:
+            self.rotation_failed = False
+        self.next_rollover = self._compute_next(time.time())
+
+    def _rotate(self):
+        if os.path.exists(self.baseFilename):
+            ext = '.gz' if self.compress else ''
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            dest = f"{self.baseFilename}.{stamp}"
+            n = 1
+            while os.path.exists(dest + ext):
+                dest = f"{self.baseFilename}.{stamp}.{n}"
+                n += 1
+
+            if self.compress:
+                try:
+                    with open(self.baseFilename, 'rb') as src, gzip.open(dest + ext, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(self.baseFilename)
+                except OSError:
+                    # No half-rotated copy next to the file that is kept
+                    if os.path.exists(dest + ext):
+                        try:
+                            os.remove(dest + ext)
+                        except OSError:
+                            pass
+                    raise
+            else:
+                os.rename(self.baseFilename, dest)
+            self._prune()
+
+    def _prune(self):
+        if self.backup_count <= 0:
+            return
+        backups = sorted(glob.glob(glob.escape(self.baseFilename) + '.*'),
+                         key=os.path.getmtime)
+        for old in backups[:-self.backup_count]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def _level(name: str) -> int:
+    level = logging.getLevelName(str(name).upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+def setup_logging(config=None, log_queue=None) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to the console and the rotating
+    log file. Returns the started listener; call stop() on shutdown to
+    flush it. log_queue may be a multiprocessing queue shared with
+    worker processes (see attach_worker).
+    """
+    def get(key, fallback):
+        if config is None:
+            return fallback
+        return config.get('logging', key, fallback=fallback)
+
+    level = _level(get('level', 'INFO'))
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+
+    if str(get('console', 'true')).lower() in ('1', 'true', 'yes', 'on'):
+        console = logging.StreamHandler(sys.stderr)
+        console.setFormatter(formatter)
+        handlers.append(console)
+
+    problem = None
+    path = get('file', None)
+    if path:
+        try:
+            file_handler = RotatingLogHandler(
+                path,
+                max_bytes=int(float(get('max_size_mb', 5)) * 1024 * 1024),
+                interval=float(get('rotate_hours', 24)) * 3600,
+                backup_count=int(get('backup_count', 7)),
+                compress=str(get('compress', 'true')).lower() in ('1', 'true', 'yes', 'on'),
+            )
+            # Fail now rather than in the listener thread
+            file_handler.stream = file_handler._open()
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            problem = f"Cannot write log file {path} ({e}), logging to console only"
+
+    if log_queue is None:
+        log_queue = queue.SimpleQueue()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+
+    if problem:
+        logging.getLogger('LinkedBench').warning(problem)
+    return listener
+
+
+def attach_worker(log_queue, level, name: str):
+    """In a worker process: send every record to the parent's listener"""
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter(f'[{name}] %(message)s'))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
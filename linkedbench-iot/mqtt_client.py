@@ -6,49 +6,97 @@ Publishes events to cloud platform
 
 import json
 import logging
-from typing import Dict, Any
+import threading
+from typing import Any, Callable, Dict, Optional
 
-try:
-    import paho.mqtt.client as mqtt
-except ImportError:
-    mqtt = None
+from events import Event
+
+# paho-mqtt is imported lazily (see _load_paho) so that importing this
+# module does not slow down the bench startup
+mqtt = None
 
 logger = logging.getLogger('LinkedBench.MQTT')
 
 
+def _load_paho():
+    """Import paho-mqtt on first use, returns None if not installed"""
+    global mqtt
+    if mqtt is None:
+        try:
+            import paho.mqtt.client as paho_client
+        except ImportError:
+            return None
+        mqtt = paho_client
+    return mqtt
+
+
 class MQTTPublisher:
     """MQTT publisher for LinkedBench events"""
     
-    def __init__(self, bench_id: str, broker: str = "test.mosquitto.org", port: int = 1883):
+    def __init__(self, bench_id: str, broker: str = "test.mosquitto.org", port: int = 1883,
+                 min_backoff: float = 1.0, max_backoff: float = 60.0,
+                 on_command: Optional[Callable[[Dict[str, Any]], Any]] = None):
         self.bench_id = bench_id
         self.broker = broker
         self.port = port
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
         self.client = None
         self.connected = False
+        self.on_command = on_command
+        self.command_topic = f"linkedbench/{bench_id}/cmd"
         
-        if mqtt is None:
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Connect to the broker in the background (non-blocking)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._connect_loop,
+                                        name="mqtt-connect", daemon=True)
+        self._thread.start()
+    
+    def _connect_loop(self):
+        """Import paho and connect, retrying with exponential backoff"""
+        if _load_paho() is None:
             logger.warning("paho-mqtt not installed, MQTT disabled")
             return
         
         try:
-            self.client = mqtt.Client(client_id=f"linkedbench_{bench_id}")
-            self.client.on_connect = self._on_connect
-            self.client.on_disconnect = self._on_disconnect
-            
-            # Connect to broker
-            logger.info(f"Connecting to MQTT broker {broker}:{port}")
-            self.client.connect(broker, port, keepalive=60)
-            self.client.loop_start()
-            
+            client = mqtt.Client(client_id=f"linkedbench_{self.bench_id}")
+            client.on_connect = self._on_connect
+            client.on_disconnect = self._on_disconnect
+            client.on_message = self._on_message
+            # Backoff used by paho when reconnecting after a lost connection
+            client.reconnect_delay_set(min_delay=int(self.min_backoff),
+                                       max_delay=int(self.max_backoff))
         except Exception as e:
             logger.error(f"Failed to initialize MQTT client: {e}")
-            self.client = None
+            return
+        
+        delay = self.min_backoff
+        while not self._stop.is_set():
+            try:
+                logger.info(f"Connecting to MQTT broker {self.broker}:{self.port}")
+                client.connect(self.broker, self.port, keepalive=60)
+                client.loop_start()
+                self.client = client
+                return
+            except Exception as e:
+                logger.warning(f"MQTT connection failed ({e}), retrying in {delay:.0f}s")
+                if self._stop.wait(delay):
+                    return
+                delay = min(delay * 2, self.max_backoff)
     
     def _on_connect(self, client, userdata, flags, rc):
         """Callback for successful connection"""
         if rc == 0:
             self.connected = True
             logger.info("Connected to MQTT broker")
+            # (Re)subscribe on every connection, subscriptions are not persistent
+            if self.on_command:
+                client.subscribe(self.command_topic, qos=1)
         else:
             logger.error(f"Failed to connect to MQTT broker, return code: {rc}")
     
@@ -60,6 +108,36 @@ class MQTTPublisher:
         else:
             logger.info("Disconnected from MQTT broker")
     
+    def _on_message(self, client, userdata, msg):
+        """Callback for incoming commands"""
+        if msg.topic != self.command_topic or self.on_command is None:
+            return
+        try:
+            data = json.loads(msg.payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed command on {msg.topic}")
+            return
+        if not isinstance(data, dict):
+            logger.warning(f"Ignoring malformed command on {msg.topic}")
+            return
+        try:
+            self.on_command(data)
+        except Exception as e:
+            logger.error(f"Error handling command: {e}", exc_info=True)
+    
+    def publish_command_result(self, result: Dict[str, Any]):
+        """Publish the outcome of a command received over MQTT"""
+        if self.client is None or not self.connected:
+            return False
+        
+        try:
+            topic = f"{self.command_topic}/result"
+            info = self.client.publish(topic, json.dumps(result), qos=1)
+            return info.rc == mqtt.MQTT_ERR_SUCCESS
+        except Exception as e:
+            logger.error(f"Error publishing command result: {e}")
+            return False
+    
     def publish_event(self, event: Dict[str, Any]):
         """Publish an event to MQTT"""
         if self.client is None or not self.connected:
@@ -68,19 +146,20 @@ class MQTTPublisher:
         
         try:
             topic = f"linkedbench/{self.bench_id}/events"
-            payload = json.dumps(event)
+            # Event records carry their encoding, shared with the database
+            payload = event.payload if isinstance(event, Event) else json.dumps(event)
             
             result = self.client.publish(topic, payload, qos=1)
             
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.debug(f"Published event to {topic}: {event['event_type']}")
+                logger.debug("Published event to %s: %s", topic, event['event_type'])
                 return True
             else:
-                logger.error(f"Failed to publish event: {result.rc}")
+                logger.error("Failed to publish event: %s", result.rc)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error publishing event: {e}", exc_info=True)
+            logger.error("Error publishing event: %s", e, exc_info=True)
             return False
     
     def publish_status(self, status: Dict[str, Any]):
@@ -101,6 +180,7 @@ class MQTTPublisher:
     
     def disconnect(self):
         """Disconnect from MQTT broker"""
+        self._stop.set()
         if self.client:
             self.client.loop_stop()
             self.client.disconnect()
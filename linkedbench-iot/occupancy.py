@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Occupancy stabilization for LinkedBench
+
+Two layers on top of the 0.2 s debounce of PressurePlate:
+- per-seat hysteresis: a seat must stay pressed for enter_hold seconds
+  to count as occupied, and released for leave_hold seconds to count
+  as free
+- merge window: when the bench empties, the vacation is held back for
+  merge_window seconds; if someone sits down again in that time, the
+  vacation/occupation pair is dropped and the session continues
+
+All times come from the sensor clock, so trace replays stay deterministic.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+
+class SeatHysteresis:
+    """Stable seat state with separate enter and leave hold times"""
+
+    def __init__(self, enter_hold: float, leave_hold: float):
+        self.enter_hold = enter_hold
+        self.leave_hold = leave_hold
+        self.state = False
+        self._since: Optional[float] = None
+        self.flaps = 0
+
+    @property
+    def pending(self) -> bool:
+        return self._since is not None
+
+    def update(self, raw: bool, now: float) -> bool:
+        if raw == self.state:
+            if self._since is not None:
+                # Changed and came back before the hold time: a flap
+                self.flaps += 1
+                self._since = None
+            return self.state
+
+        if self._since is None:
+            self._since = now
+        hold = self.enter_hold if raw else self.leave_hold
+        if now - self._since >= hold:
+            self.state = raw
+            self._since = None
+        return self.state
+
+
+class OccupancyFilter:
+    """Seat hysteresis plus vacate-then-reoccupy merging"""
+
+    def __init__(self, enter_hold: float = 0.5, leave_hold: float = 1.0,
+                 merge_window: float = 5.0):
+        self.enter_hold = enter_hold
+        self.leave_hold = leave_hold
+        self.merge_window = merge_window
+        self.seats = (SeatHysteresis(enter_hold, leave_hold),
+                      SeatHysteresis(enter_hold, leave_hold))
+        self.suppressed_events = 0
+        # Held-back vacation: (time, event epoch time, mode before leaving)
+        self._vacation: Optional[Tuple[float, float, int]] = None
+
+    @classmethod
+    def from_config(cls, config) -> 'OccupancyFilter':
+        """Build from the [occupancy] section of config.ini"""
+        return cls(
+            enter_hold=config.getfloat('occupancy', 'enter_hold', fallback=0.5),
+            leave_hold=config.getfloat('occupancy', 'leave_hold', fallback=1.0),
+            merge_window=config.getfloat('occupancy', 'merge_window', fallback=5.0),
+        )
+
+    @property
+    def pending(self) -> bool:
+        """True while a hold time or the merge window is still running"""
+        return self._vacation is not None or any(seat.pending for seat in self.seats)
+
+    @property
+    def flaps(self) -> int:
+        return sum(seat.flaps for seat in self.seats)
+
+    def update(self, p1: bool, p2: bool, now: float) -> Tuple[bool, bool]:
+        return self.seats[0].update(p1, now), self.seats[1].update(p2, now)
+
+    def hold_vacation(self, now: float, created: float, mode: int) -> bool:
+        """Hold a vacation back; False if merging is disabled"""
+        if self.merge_window <= 0:
+            return False
+        self._vacation = (now, created, mode)
+        return True
+
+    def cancel_vacation(self) -> Optional[int]:
+        """Drop the held-back vacation on reoccupation, returns the previous mode"""
+        if self._vacation is None:
+            return None
+        _, _, mode = self._vacation
+        self._vacation = None
+        self.suppressed_events += 2
+        return mode
+
+    def expired_vacation(self, now: float) -> Optional[float]:
+        """Event time of a held-back vacation whose merge window has passed"""
+        if self._vacation is None or now - self._vacation[0] < self.merge_window:
+            return None
+        _, created, _ = self._vacation
+        self._vacation = None
+        return created
+
+    def settings(self) -> Dict[str, float]:
+        return {
+            'enter_hold': self.enter_hold,
+            'leave_hold': self.leave_hold,
+            'merge_window': self.merge_window,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.settings(),
+            'suppressed_events': self.suppressed_events,
+            'seat_flaps': self.flaps,
+        }
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Optional multi-process layout for LinkedBench
+
+    core process  : sensor loop, mode state machine, LED/buzzer/display (GPIO)
+    sink process  : SQLite + MQTT (event persistence and publication)
+    api process   : Flask REST API
+
+The core publishes the bench state through a shared-memory segment
+(single writer, seqlock, no locks shared between processes) and sends
+events to the sink over a pipe-based queue. JSON serialization, SQLite
+queries and network I/O therefore never hold the core's GIL.
+
+Enable it with:  python3 linkedbench3.py --multiprocess
+"""
+
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import signal
+import struct
+import threading
+import time
+from datetime import datetime
+from multiprocessing import shared_memory
+from threading import Thread
+from typing import Any, Dict, Optional, Tuple
+
+from commands import RoundTripStats
+from log_setup import attach_worker, setup_logging
+from database import EventDatabase
+from occupancy import OccupancyFilter
+from recent_events import RecentEvents
+import linkedbench3
+from linkedbench3 import LinkedBenchSystem, MODE_NAMES, COMMAND_TIMEOUT, RECENT_EVENTS_SIZE
+
+logger = logging.getLogger('LinkedBench.Process')
+
+DEFAULT_DB_PATH = "/var/lib/linkedbench/events.db"
+# A write of the shared state takes microseconds; longer means the writer is gone
+READ_TIMEOUT = 0.5
+SINK_NAME = "linkedbench-sink"
+
+
+class SharedBenchState:
+    """
+    Bench state in a shared-memory segment.
+
+    Layout: sequence (uint32), occupied, mode, seat1, seat2 (uint8 each),
+    last update as epoch seconds (float64), suppressed events and seat
+    flaps of the occupancy filter (uint32 each). The core's sensor thread is
+    the only writer; it makes the sequence odd while writing, so readers
+    retry until they see the same even value before and after the copy.
+    """
+
+    LAYOUT = struct.Struct('<IBBBBdII')
+    SEQ = struct.Struct('<I')
+
+    def __init__(self, name: Optional[str] = None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.LAYOUT.size)
+            self.owner = True
+            self.LAYOUT.pack_into(self.shm.buf, 0, 0, 0, 0, 0, 0, 0.0, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self._seq = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, occupied: bool, mode: int, seat1: bool, seat2: bool,
+              suppressed: int = 0, flaps: int = 0):
+        buf = self.shm.buf
+        self._seq += 1
+        self.SEQ.pack_into(buf, 0, self._seq)
+        self.LAYOUT.pack_into(buf, 0, self._seq, occupied, mode, seat1, seat2, time.time(),
+                              suppressed, flaps)
+        self._seq += 1
+        self.SEQ.pack_into(buf, 0, self._seq)
+
+    def read(self, timeout: float = READ_TIMEOUT) -> Tuple[bool, int, bool, bool, float, int, int]:
+        """Consistent snapshot; TimeoutError if a write never completes (writer died)"""
+        buf = self.shm.buf
+        deadline = time.monotonic() + timeout
+        while True:
+            seq, occupied, mode, seat1, seat2, updated, suppressed, flaps = \
+                self.LAYOUT.unpack_from(buf, 0)
+            if seq % 2 == 0 and self.SEQ.unpack_from(buf, 0)[0] == seq:
+                return bool(occupied), mode, bool(seat1), bool(seat2), updated, suppressed, flaps
+            if time.monotonic() > deadline:
+                raise TimeoutError("Bench state is not being updated (core process stopped?)")
+            time.sleep(0)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class Channels:
+    """Inter-process queues, all pipe based"""
+
+    def __init__(self, ctx):
+        self.events = ctx.Queue()      # core -> sink: ('event', e) / ('command_result', r)
+        self.saved = ctx.Queue()       # sink -> api:  (event_id, event)
+        self.commands = ctx.Queue()    # api/sink -> core: (origin, request_id, mode or None)
+        self.replies = ctx.Queue()     # core -> api:  (request_id, error, status, rtt_ms)
+
+
+# ================= CORE =================
+
+class CoreBenchSystem(LinkedBenchSystem):
+    """LinkedBenchSystem that delegates storage, MQTT and API to worker processes"""
+
+    def __init__(self, bench_id, shared: SharedBenchState, channels: Channels,
+                 workers, trace_path=None, config=None):
+        super().__init__(bench_id, trace_path=trace_path, config=config)
+        self.shared = shared
+        self.channels = channels
+        self.workers = workers
+        # REST commands not answered yet, so the API process can cancel them
+        self._remote_commands: Dict[int, Any] = {}
+        self._remote_lock = threading.Lock()
+
+    def _deferred_startup(self):
+        # Each phase fails on its own, as in LinkedBenchSystem._deferred_startup
+        with self.startup.phase("procesos (sink, api)"):
+            for worker in self.workers:
+                try:
+                    worker.start()
+                except Exception as e:
+                    logger.error(f"Process {worker.name} failed to start: {e}", exc_info=True)
+
+        Thread(target=self._event_processor, name="event-forwarder", daemon=True).start()
+        Thread(target=self._command_bridge, name="command-bridge", daemon=True).start()
+
+        with self.startup.phase("display"):
+            try:
+                display = linkedbench3.I2CDisplay()
+            except:
+                display = None
+            self.display = display
+            try:
+                self._update_display()
+            except Exception as e:
+                logger.error(f"Error updating the display: {e}")
+
+        logger.info("SISTEMA LISTO (multiproceso)")
+        self.startup.report()
+        self.scheduler.freeze()
+
+    def _publish_state(self):
+        with self.lock:
+            state = (self.occupied, self.current_mode, self.seat1_active, self.seat2_active,
+                     self.occupancy.suppressed_events, self.occupancy.flaps)
+        self.shared.write(*state)
+
+    def _seat_step(self):
+        super()._seat_step()
+        # Also acts as a heartbeat for the API process
+        self._publish_state()
+
+    def _cycle_mode(self):
+        super()._cycle_mode()
+        self._publish_state()
+
+    def _apply_command(self, command):
+        super()._apply_command(command)
+        self._publish_state()
+
+    def _event_processor(self):
+        """Forward events to the sink process"""
+        sink = next((w for w in self.workers if w.name == SINK_NAME), None)
+        while self.running:
+            try:
+                event = self.event_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if sink is None or sink.pid is None:
+                # Nothing would read the queue: drop instead of piling up
+                continue
+            self.channels.events.put(('event', event))
+
+    def _command_bridge(self):
+        """Turn commands from other processes into ModeCommands"""
+        while self.running:
+            try:
+                origin, request_id, mode = self.channels.commands.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return    # queue closed during shutdown
+
+            if origin == 'sampling':
+                # Scheduler statistics live in this process
+                self.channels.replies.put((request_id, None, self.get_sampling_stats(), 0.0))
+                continue
+
+            if origin == 'cancel':
+                # The API timed out. If the command is already being applied,
+                # its callback sends the real result instead
+                with self._remote_lock:
+                    command = self._remote_commands.pop(request_id, None)
+                if command is not None and command.cancel():
+                    self.channels.replies.put((request_id, None, None, None))
+                continue
+
+            def reply(command, origin=origin, request_id=request_id):
+                if origin == 'mqtt':
+                    self.channels.events.put(('command_result', {
+                        'id': request_id,
+                        'ok': command.error is None,
+                        'error': command.error,
+                        'status': command.status,
+                        'rtt_ms': round(command.rtt_ms, 3)
+                    }))
+                else:
+                    with self._remote_lock:
+                        self._remote_commands.pop(request_id, None)
+                    self.channels.replies.put((request_id, command.error,
+                                               command.status, command.rtt_ms))
+
+            if origin == 'mqtt':
+                self.submit_command(mode, origin, callback=reply)
+            else:
+                with self._remote_lock:
+                    self._remote_commands[request_id] = self.submit_command(
+                        mode, origin, callback=reply)
+
+    def stop(self):
+        try:
+            super().stop()
+            self.channels.events.put(None)
+            # Workers that never started cannot be joined
+            for worker in [w for w in self.workers if w.pid is not None]:
+                worker.join(timeout=2)
+                if worker.is_alive():
+                    worker.terminate()
+        finally:
+            self.shared.close()
+
+
+# ================= WORKERS =================
+
+def _worker_setup(name: str, log_queue, log_level: int):
+    # Ctrl+C reaches the whole process group; shutdown is driven by the core
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Records go to the core's log listener: one writer for the log file
+    attach_worker(log_queue, log_level, name)
+
+
+def sink_worker(bench_id: str, db_path: str, channels: Channels, log_queue, log_level: int):
+    """Owns the database and the MQTT connection"""
+    _worker_setup('sink', log_queue, log_level)
+    from mqtt_client import MQTTPublisher
+
+    db = EventDatabase(db_path)
+
+    def on_command(data: Dict[str, Any]):
+        try:
+            mode = int(data['mode'])
+        except (KeyError, TypeError, ValueError):
+            mqtt.publish_command_result({'id': data.get('id'), 'ok': False,
+                                         'error': 'mode field required'})
+            return
+        channels.commands.put(('mqtt', data.get('id'), mode))
+
+    mqtt = MQTTPublisher(bench_id, on_command=on_command)
+    mqtt.start()
+
+    while True:
+        message = channels.events.get()
+        if message is None:
+            break
+        kind, payload = message
+        if kind == 'event':
+            event_id = db.save_event(payload)
+            if event_id > 0:
+                channels.saved.put((event_id, payload))
+            mqtt.publish_event(payload)
+        elif kind == 'command_result':
+            mqtt.publish_command_result(payload)
+
+    mqtt.disconnect()
+    db.close()
+
+
+class RemoteBench:
+    """The subset of LinkedBenchSystem used by rest_api, backed by the core process"""
+
+    def __init__(self, bench_id: str, db_path: str, shm_name: str, channels: Channels,
+                 occupancy_settings: Optional[Dict[str, float]] = None):
+        self.bench_id = bench_id
+        # Filter settings of the core, so /api/occupancy matches the single-process layout
+        self.occupancy_settings = dict(occupancy_settings or {})
+        self.db = EventDatabase(db_path)
+        self.shared = SharedBenchState(shm_name)
+        self.channels = channels
+        self.command_stats = RoundTripStats()
+        self.recent_events = RecentEvents(RECENT_EVENTS_SIZE)
+        self.recent_events.seed(self.db.get_events(bench_id=bench_id,
+                                                   limit=RECENT_EVENTS_SIZE + 1))
+
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, list] = {}
+        self._pending_lock = threading.Lock()
+        Thread(target=self._reply_dispatcher, name="reply-dispatcher", daemon=True).start()
+        Thread(target=self._saved_listener, name="saved-listener", daemon=True).start()
+
+    def _reply_dispatcher(self):
+        while True:
+            try:
+                request_id, error, status, rtt_ms = self.channels.replies.get()
+            except (EOFError, OSError):
+                return
+            with self._pending_lock:
+                slot = self._pending.pop(request_id, None)
+            if slot:
+                slot[1:] = [error, status]
+                slot[0].set()
+
+    def _saved_listener(self):
+        while True:
+            try:
+                event_id, event = self.channels.saved.get()
+            except (EOFError, OSError):
+                return
+            self.recent_events.append(event_id, event)
+
+    def get_status(self):
+        occupied, mode = self.shared.read()[:2]
+        return {
+            'bench_id': self.bench_id,
+            'occupied': occupied,
+            'mode': mode,
+            'mode_name': MODE_NAMES[mode],
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def _request(self, origin, mode, timeout, cancel=False):
+        """
+        Send a request to the core and wait for its reply: (error, status).
+        With cancel, a request that times out is withdrawn; the core then
+        replies (None, None), or with the real result if it was already
+        being applied.
+        """
+        request_id = next(self._ids)
+        slot = [threading.Event(), None, None]
+        with self._pending_lock:
+            self._pending[request_id] = slot
+
+        self.channels.commands.put((origin, request_id, mode))
+        if not slot[0].wait(timeout) and cancel:
+            self.channels.commands.put(('cancel', request_id, None))
+            slot[0].wait(timeout)
+        if not slot[0].is_set():
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            return None
+        return slot[1], slot[2]
+
+    def set_mode(self, mode, source='rest', timeout=COMMAND_TIMEOUT):
+        start = time.perf_counter()
+        reply = self._request(source, mode, timeout, cancel=True)
+        if reply is None:
+            raise TimeoutError(f"Mode change not applied within {timeout}s")
+
+        error, status = reply
+        if error is None and status is None:
+            self.command_stats.add_cancelled()
+            raise TimeoutError(f"Mode change not applied within {timeout}s")
+
+        # Measured across processes, including both queue hops
+        rtt_ms = (time.perf_counter() - start) * 1000
+        self.command_stats.add(rtt_ms)
+
+        if error:
+            raise ValueError(error)
+        status = dict(status)
+        status['rtt_ms'] = round(rtt_ms, 3)
+        return status
+
+    def get_command_stats(self):
+        return self.command_stats.summary()
+
+    def get_occupancy_stats(self):
+        suppressed, flaps = self.shared.read()[5:]
+        return {**self.occupancy_settings, 'suppressed_events': suppressed, 'seat_flaps': flaps}
+
+    def get_sampling_stats(self):
+        reply = self._request('sampling', None, COMMAND_TIMEOUT)
+        if reply is None:
+            raise TimeoutError("Core process did not answer")
+        return reply[1]
+
+    def get_events(self, limit=100, offset=0, event_type=None):
+        events = self.recent_events.lookup(limit, offset, event_type)
+        if events is None:
+            events = self.db.get_events(bench_id=self.bench_id, limit=limit,
+                                        offset=offset, event_type=event_type)
+        return events
+
+
+def api_worker(bench_id: str, db_path: str, shm_name: str, channels: Channels,
+               host: str, port: int, occupancy_settings: Dict[str, float],
+               log_queue, log_level: int):
+    """Runs the Flask API against a RemoteBench proxy"""
+    _worker_setup('api', log_queue, log_level)
+    from rest_api import start_api_server
+
+    bench = RemoteBench(bench_id, db_path, shm_name, channels, occupancy_settings)
+    start_api_server(bench, host=host, port=port)
+
+
+# ================= ENTRY POINT =================
+
+def run(bench_id: str = "BENCH_001", db_path: str = DEFAULT_DB_PATH,
+        trace_path: Optional[str] = None, host: str = '0.0.0.0', port: int = 5000,
+        config=None):
+    """Start the bench with the core, sink and API in separate processes"""
+    # spawn: workers must not inherit the core's threads or GPIO state
+    ctx = mp.get_context('spawn')
+    log_queue = ctx.Queue()
+    listener = setup_logging(config, log_queue=log_queue)
+    log_level = logging.getLogger().level
+
+    channels = Channels(ctx)
+    shared = SharedBenchState()
+    # Same filter settings the core builds from the config
+    occupancy = OccupancyFilter.from_config(config) if config is not None else OccupancyFilter()
+
+    workers = [
+        ctx.Process(target=sink_worker,
+                    args=(bench_id, db_path, channels, log_queue, log_level),
+                    name=SINK_NAME, daemon=True),
+        ctx.Process(target=api_worker,
+                    args=(bench_id, db_path, shared.name, channels, host, port,
+                          occupancy.settings(), log_queue, log_level),
+                    name="linkedbench-api", daemon=True),
+    ]
+    try:
+        CoreBenchSystem(bench_id, shared, channels, workers, trace_path=trace_path,
+                        config=config).start()
+    finally:
+        listener.stop()
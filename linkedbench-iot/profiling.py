@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+On-demand profiling for a running LinkedBench process
+
+Nothing is installed or sampled until a profile is requested, so there
+is no overhead while disabled. Triggers:
+- SIGUSR1: dumps every thread's stack and records a short profile
+- GET /api/debug/profile (see rest_api.py), protected by a token
+
+Profiles are written in collapsed-stack format ("a;b;c count"), which
+flamegraph.pl, speedscope and similar tools read directly.
+"""
+
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+import traceback
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger('LinkedBench.Profiling')
+
+PROFILE_DIR = "/var/lib/linkedbench/profiles"
+MAX_PROFILE_SECONDS = 60.0
+
+# Only one sampling profile at a time
+_profile_lock = threading.Lock()
+
+
+def _thread_names() -> Dict[int, str]:
+    return {t.ident: t.name for t in threading.enumerate()}
+
+
+def dump_stacks() -> str:
+    """Current stack of every thread, as text"""
+    names = _thread_names()
+    chunks = []
+    for ident, frame in sys._current_frames().items():
+        name = names.get(ident, f"thread-{ident}")
+        stack = ''.join(traceback.format_stack(frame))
+        chunks.append(f"--- {name} ({ident}) ---\n{stack}")
+    return '\n'.join(chunks)
+
+
+def _collapse(frame, thread_name: str) -> str:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    frames.append(thread_name)
+    return ';'.join(reversed(frames))
+
+
+def sample_profile(seconds: float = 10.0, interval: float = 0.005) -> Optional[str]:
+    """
+    Statistical profile of all threads for `seconds`, in collapsed-stack
+    format. Returns None if another profile is already running.
+    """
+    seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+    interval = max(interval, 0.001)
+
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        me = threading.get_ident()
+        counts = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = _thread_names()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                counts[_collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+            samples += 1
+            time.sleep(interval)
+        logger.info(f"Profile finished: {samples} samples over {seconds:.1f}s")
+        return ''.join(f"{stack} {count}\n" for stack, count in counts.most_common())
+    finally:
+        _profile_lock.release()
+
+
+def write_profile(text: str, kind: str, out_dir: str = PROFILE_DIR) -> str:
+    """Save a stack dump or profile and return its path"""
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(out_dir, f"{kind}-{os.getpid()}-{stamp}.txt")
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+
+def _profile_on_signal(seconds: float, out_dir: str):
+    try:
+        path = write_profile(dump_stacks(), 'stacks', out_dir)
+        logger.info(f"Thread stacks written to {path}")
+
+        collapsed = sample_profile(seconds)
+        if collapsed is None:
+            logger.warning("A profile is already running, request ignored")
+            return
+        path = write_profile(collapsed, 'profile', out_dir)
+        logger.info(f"Collapsed-stack profile written to {path}")
+    except Exception as e:
+        logger.error(f"Profiling failed: {e}", exc_info=True)
+
+
+def install_signal_handler(signum: int = getattr(signal, 'SIGUSR1', None),
+                           seconds: float = 10.0, out_dir: str = PROFILE_DIR):
+    """Dump stacks and profile for `seconds` when `signum` is received"""
+    if signum is None:
+        return
+
+    def handler(*_):
+        # Keep the handler short: the work runs in its own thread
+        threading.Thread(target=_profile_on_signal, args=(seconds, out_dir),
+                         name="profiler", daemon=True).start()
+
+    signal.signal(signum, handler)
+    logger.debug(f"Profiling available via signal {signum}")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+In-memory ring buffer of the most recent LinkedBench events
+Serves hot reads (dashboard, /api/events) without touching SQLite
+"""
+
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from events import as_dict
+
+
+class RecentEvents:
+    """
+    Bounded buffer with the newest events, in the same row format
+    returned by EventDatabase.get_events.
+
+    Returned rows are shared with the buffer and must not be modified.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._rows = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        # True while the buffer holds the whole history (nothing evicted yet)
+        self._complete = True
+        self.hits = 0
+        self.misses = 0
+
+    def seed(self, rows: List[Dict[str, Any]]):
+        """
+        Load existing rows (newest first, as returned by get_events).
+        Pass up to capacity + 1 rows so the buffer can tell whether it
+        holds the whole history.
+        """
+        with self._lock:
+            self._rows.clear()
+            self._rows.extend(reversed(rows[:self.capacity]))
+            self._complete = len(rows) <= self.capacity
+
+    def append(self, event_id: int, event: Dict[str, Any]):
+        """Add an event that has just been saved to the database"""
+        data = as_dict(event)
+        row = {
+            'id': event_id,
+            'bench_id': data.get('bench_id'),
+            'event_type': data.get('event_type'),
+            'mode': data.get('mode'),
+            'mode_name': data.get('mode_name'),
+            'timestamp': data.get('timestamp'),
+            'data': data,
+            # Same format as SQLite's CURRENT_TIMESTAMP (UTC)
+            'created_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with self._lock:
+            # Ids grow monotonically; skip events already loaded by seed()
+            if self._rows and event_id <= self._rows[-1]['id']:
+                return
+            if len(self._rows) == self.capacity:
+                self._complete = False
+            self._rows.append(row)
+
+    def lookup(self, limit: int, offset: int = 0,
+               event_type: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Newest-first rows, or None when the request reaches past what the
+        buffer holds and has to go to the database
+        """
+        if limit < 0 or offset < 0 or offset + limit > self.capacity:
+            self.misses += 1
+            return None
+
+        result = []
+        skip = offset
+        with self._lock:
+            for row in reversed(self._rows):
+                if event_type and row['event_type'] != event_type:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                if len(result) == limit:
+                    break
+                result.append(row)
+            complete = self._complete
+
+        if len(result) < limit and not complete:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': len(self._rows),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -4,14 +4,16 @@ REST API for LinkedBench system
 Provides endpoints for status, control, and data access
 """
 
+import hmac
 import logging
 from datetime import datetime
 from typing import TYPE_CHECKING
 import os
 
+from static_assets import DashboardBundle, IMMUTABLE_CACHE, PAGE_CACHE, accepts_gzip, gzip_bytes
+
 try:
-    # ### NUEVO: Añadido send_from_directory para servir el HTML
-    from flask import Flask, jsonify, request, send_from_directory
+    from flask import Flask, Response, abort, jsonify, request
     from flask_cors import CORS
 except ImportError:
     Flask = None
@@ -22,6 +24,41 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger('LinkedBench.API')
 
+# Debug routes are disabled unless this environment variable holds a token
+DEBUG_TOKEN_ENV = 'LINKEDBENCH_DEBUG_TOKEN'
+
+# JSON bodies smaller than this are sent as is (gzip would not pay off)
+JSON_GZIP_MIN_SIZE = 1024
+JSON_GZIP_LEVEL = 5
+
+
+def _debug_authorized() -> bool:
+    """Check the bearer token of a debug request"""
+    token = os.environ.get(DEBUG_TOKEN_ENV)
+    if not token:
+        return False
+    auth = request.headers.get('Authorization', '')
+    if not auth.startswith('Bearer '):
+        return False
+    return hmac.compare_digest(auth[len('Bearer '):].encode(), token.encode())
+
+
+def _send_asset(asset, cache_control: str) -> 'Response':
+    """Serve a prebuilt asset, gzipped if the client accepts it"""
+    gzipped = accepts_gzip(request.headers.get('Accept-Encoding'))
+    # Different bytes per encoding, so different ETags
+    etag = asset.etag + ('-gz' if gzipped else '')
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(asset.gzipped if gzipped else asset.body, mimetype=asset.mimetype)
+        if gzipped:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
 
 def create_app(system: 'LinkedBenchSystem') -> Flask:
     """Create Flask application"""
@@ -39,13 +76,47 @@ def create_app(system: 'LinkedBenchSystem') -> Flask:
     # Store system reference
     app.config['LINKEDBENCH_SYSTEM'] = system
 
-    # ### NUEVO: Ruta para mostrar el Dashboard ###
+    # Built once: dashboard.html next to this module, not in the working directory.
+    # Without it only the dashboard routes fail (404), the API keeps working
+    try:
+        dashboard = DashboardBundle()
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error(f"Dashboard not available: {e}")
+        dashboard = None
+
     @app.route('/dashboard')
     @app.route('/ui')
     def serve_dashboard():
-        """Sirve el archivo dashboard.html"""
-        # Asume que el dashboard.html está en la misma carpeta
-        return send_from_directory('.', 'dashboard.html')
+        """Dashboard page (revalidated on every visit)"""
+        if dashboard is None:
+            abort(404)
+        return _send_asset(dashboard.page, PAGE_CACHE)
+    
+    @app.route('/assets/<name>')
+    def serve_asset(name):
+        """Content-hashed dashboard assets (cached forever)"""
+        asset = dashboard.assets.get(name) if dashboard else None
+        if asset is None:
+            abort(404)
+        return _send_asset(asset, IMMUTABLE_CACHE)
+    
+    @app.after_request
+    def compress_json(response):
+        """Gzip larger JSON responses for clients that accept it"""
+        if (response.mimetype != 'application/json'
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.status_code < 200 or response.status_code >= 300):
+            return response
+        response.vary.add('Accept-Encoding')
+        if not accepts_gzip(request.headers.get('Accept-Encoding')):
+            return response
+        body = response.get_data()
+        if len(body) < JSON_GZIP_MIN_SIZE:
+            return response
+        response.set_data(gzip_bytes(body, JSON_GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
     
     @app.route('/')
     def index():
@@ -53,12 +124,15 @@ def create_app(system: 'LinkedBenchSystem') -> Flask:
         return jsonify({
             'name': 'LinkedBench API',
             'version': '1.0.0',
-            'dashboard_url': '/dashboard',  # ### NUEVO: Indicar dónde está el dashboard
+            'dashboard_url': '/dashboard',
             'endpoints': {
                 'status': '/api/status',
                 'events': '/api/events',
                 'statistics': '/api/statistics',
-                'mode': '/api/mode'
+                'mode': '/api/mode',
+                'commands': '/api/commands',
+                'occupancy': '/api/occupancy',
+                'sampling': '/api/sampling'
             }
         })
     
@@ -98,15 +172,45 @@ def create_app(system: 'LinkedBenchSystem') -> Flask:
                 if mode < 0 or mode > 3:
                     return jsonify({'error': 'Invalid mode value (0-3)'}), 400
                 
-                status = system.set_mode(mode)
+                status = system.set_mode(mode, source='rest')
                 return jsonify(status), 200
                 
             except ValueError as e:
                 return jsonify({'error': str(e)}), 400
+            except TimeoutError as e:
+                logger.error(f"Error setting mode: {e}")
+                return jsonify({'error': str(e)}), 504
             except Exception as e:
                 logger.error(f"Error setting mode: {e}")
                 return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/commands')
+    def get_command_stats():
+        """Round-trip times of remote mode commands"""
+        try:
+            return jsonify(system.get_command_stats()), 200
+        except Exception as e:
+            logger.error(f"Error getting command stats: {e}")
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/occupancy')
+    def get_occupancy_stats():
+        """Occupancy filter settings and suppressed event counts"""
+        try:
+            return jsonify(system.get_occupancy_stats()), 200
+        except Exception as e:
+            logger.error(f"Error getting occupancy stats: {e}")
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/sampling')
+    def get_sampling_stats():
+        """Sensor sampling rates, latency/jitter histograms and overruns"""
+        try:
+            return jsonify(system.get_sampling_stats()), 200
+        except Exception as e:
+            logger.error(f"Error getting sampling stats: {e}")
+            return jsonify({'error': str(e)}), 500
+    
     @app.route('/api/events')
     def get_events():
         """Get event history"""
@@ -115,8 +219,7 @@ def create_app(system: 'LinkedBenchSystem') -> Flask:
             offset = request.args.get('offset', default=0, type=int)
             event_type = request.args.get('type', default=None, type=str)
             
-            events = system.db.get_events(
-                bench_id=system.bench_id,
+            events = system.get_events(
                 limit=limit,
                 offset=offset,
                 event_type=event_type
@@ -141,6 +244,32 @@ def create_app(system: 'LinkedBenchSystem') -> Flask:
         except Exception as e:
             logger.error(f"Error getting statistics: {e}")
             return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/debug/profile')
+    def debug_profile():
+        """
+        Thread stacks (?mode=stacks) or a time-boxed sampling profile in
+        collapsed-stack format (?seconds=10&interval=0.005)
+        """
+        if not _debug_authorized():
+            return jsonify({'error': 'unauthorized'}), 403
+        
+        import profiling
+        
+        try:
+            if request.args.get('mode') == 'stacks':
+                return Response(profiling.dump_stacks(), mimetype='text/plain')
+            
+            seconds = request.args.get('seconds', default=10.0, type=float)
+            interval = request.args.get('interval', default=0.005, type=float)
+            collapsed = profiling.sample_profile(seconds, interval)
+            if collapsed is None:
+                return jsonify({'error': 'a profile is already running'}), 409
+            return Response(collapsed, mimetype='text/plain')
+            
+        except Exception as e:
+            logger.error(f"Error profiling: {e}")
+            return jsonify({'error': str(e)}), 500
             
     return app
 
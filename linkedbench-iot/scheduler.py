@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Deadline scheduler for the LinkedBench sensor loop
+
+Each task runs at a fixed rate against absolute deadlines on the
+monotonic clock (start + n * period), so the time spent in a step or in
+the idle callback never shifts later samples. Deadlines that were missed
+entirely are skipped and counted as overruns instead of being run in a
+burst.
+
+Per task it keeps histograms of:
+- latency: how late a step started with respect to its deadline
+- jitter: deviation of the interval between two starts from the period
+- duration: how long the step itself took
+
+Garbage collection can be kept out of the steps (gc_defer) and the
+objects created during startup can be moved out of the collector's reach
+(gc_freeze), which shortens the collections that still happen.
+"""
+
+import bisect
+import gc
+import logging
+import math
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger('LinkedBench.Scheduler')
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations (added in seconds, reported in ms)"""
+
+    def __init__(self, bounds_ms=BUCKETS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self._bounds = [b / 1000 for b in self.bounds_ms]
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.bounds_ms) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def add(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self._bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def _percentile(self, p: float) -> float:
+        """Upper bound (ms) of the bucket holding the p-th percentile, capped at the max"""
+        rank = math.ceil(self.count * p / 100)
+        max_ms = round(self.max * 1000, 3)
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and i < len(self.bounds_ms):
+                return min(self.bounds_ms[i], max_ms)
+        return max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            if not self.count:
+                return {'count': 0}
+            labels = [f"<={b}" for b in self.bounds_ms] + [f">{self.bounds_ms[-1]}"]
+            return {
+                'count': self.count,
+                'mean_ms': round(self.total / self.count * 1000, 3),
+                'p50_ms': self._percentile(50),
+                'p95_ms': self._percentile(95),
+                'p99_ms': self._percentile(99),
+                'max_ms': round(self.max * 1000, 3),
+                'buckets': {label: n for label, n in zip(labels, self.counts) if n},
+            }
+
+
+class Task:
+    """A periodic step and its timing statistics"""
+
+    __slots__ = ('name', 'period', 'fn', 'next_deadline', 'last_start',
+                 'runs', 'overruns', 'latency', 'jitter', 'duration')
+
+    def __init__(self, name: str, rate_hz: float, fn: Callable[[], Any]):
+        if rate_hz <= 0:
+            raise ValueError(f"{name}: sampling rate must be positive")
+        self.name = name
+        self.period = 1.0 / rate_hz
+        self.fn = fn
+        self.next_deadline = 0.0
+        self.last_start: Optional[float] = None
+        self.runs = 0
+        self.overruns = 0
+        self.latency = Histogram()
+        self.jitter = Histogram()
+        self.duration = Histogram()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rate_hz': round(1.0 / self.period, 3),
+            'runs': self.runs,
+            'overruns': self.overruns,
+            'latency': self.latency.summary(),
+            'jitter': self.jitter.summary(),
+            'duration': self.duration.summary(),
+        }
+
+
+class DeadlineScheduler:
+    """Runs periodic tasks on absolute monotonic deadlines"""
+
+    def __init__(self, gc_defer: bool = False, gc_freeze: bool = False,
+                 switch_interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.gc_defer = gc_defer
+        self.gc_freeze = gc_freeze
+        self.switch_interval = switch_interval
+        self.clock = clock
+        self.tasks: List[Task] = []
+
+    @classmethod
+    def from_config(cls, config) -> 'DeadlineScheduler':
+        """Build from the [sampling] section of config.ini"""
+        switch_ms = config.getfloat('sampling', 'switch_interval_ms', fallback=0)
+        return cls(
+            gc_defer=config.getboolean('sampling', 'gc_defer', fallback=False),
+            gc_freeze=config.getboolean('sampling', 'gc_freeze', fallback=False),
+            switch_interval=switch_ms / 1000 if switch_ms > 0 else None,
+        )
+
+    def add(self, name: str, rate_hz: float, fn: Callable[[], Any]) -> Task:
+        task = Task(name, rate_hz, fn)
+        self.tasks.append(task)
+        return task
+
+    def freeze(self):
+        """Call once startup is complete: long-lived objects skip future collections"""
+        if self.gc_freeze and hasattr(gc, 'freeze'):
+            gc.collect()
+            gc.freeze()
+            logger.info("GC: %d objects frozen", gc.get_freeze_count())
+
+    def _run_task(self, task: Task, start: float):
+        task.latency.add(start - task.next_deadline)
+        if task.last_start is not None:
+            task.jitter.add(abs(start - task.last_start - task.period))
+        task.last_start = start
+
+        # The collector is process wide: keep it out of the step
+        deferred = self.gc_defer and gc.isenabled()
+        if deferred:
+            gc.disable()
+        try:
+            task.fn()
+        finally:
+            if deferred:
+                gc.enable()
+
+        end = self.clock()
+        task.duration.add(end - start)
+        task.runs += 1
+
+        task.next_deadline += task.period
+        if task.next_deadline <= end:
+            # Skip the deadlines that are already gone instead of catching up
+            missed = math.floor((end - task.next_deadline) / task.period) + 1
+            task.overruns += missed
+            task.next_deadline += missed * task.period
+
+    def run(self, running: Callable[[], bool], idle: Callable[[float], Any]):
+        """
+        Run the tasks until running() is False. Between deadlines idle(seconds)
+        is called with the time left; it may return early.
+        """
+        if self.switch_interval:
+            # Threads waiting for the GIL (e.g. this one after a sleep) get it sooner
+            sys.setswitchinterval(self.switch_interval)
+
+        now = self.clock()
+        for task in self.tasks:
+            task.next_deadline = now
+        while running():
+            task = min(self.tasks, key=lambda t: t.next_deadline)
+            now = self.clock()
+            wait = task.next_deadline - now
+            if wait > 0:
+                idle(wait)
+                continue
+            self._run_task(task, now)
+
+    def reset_stats(self):
+        for task in self.tasks:
+            task.latency.reset()
+            task.jitter.reset()
+            task.duration.reset()
+            task.runs = task.overruns = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'gc_defer': self.gc_defer,
+            'gc_frozen': gc.get_freeze_count() if hasattr(gc, 'get_freeze_count') else 0,
+            'switch_interval_ms': round(sys.getswitchinterval() * 1000, 3),
+            'tasks': {task.name: task.stats() for task in self.tasks},
+        }
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Raw sensor trace recording and replay for LinkedBench
+
+A trace stores the raw (pre-debounce) GPIO samples of the pressure plates
+and the mode button in a compact binary file. Traces can be replayed
+through the same state machine as _sensor_loop, either in real time or
+as fast as possible, to get deterministic input for debugging and for
+benchmarking the event pipeline. Seats and button are sampled at the
+rates of the [sampling] section, like the live sensor loop.
+
+File format (little endian):
+    header: magic b'LBTR', version (uint8), start epoch (float64)
+    record: offset in microseconds (uint64), channel (uint8), value (uint8)
+
+Only changes of a channel are written, so an idle bench costs nothing.
+"""
+
+import math
+import struct
+import sys
+import time
+import types
+import logging
+import threading
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger('LinkedBench.Trace')
+
+MAGIC = b'LBTR'
+VERSION = 1
+HEADER = struct.Struct('<4sBd')
+RECORD = struct.Struct('<QBB')
+
+# Channel ids are fixed so that traces stay comparable between benches
+CHANNELS = ('Seat1', 'Seat2', 'ModeButton')
+CHANNEL_IDS = {name: i for i, name in enumerate(CHANNELS)}
+
+
+class TraceRecorder:
+    """Writes raw sensor samples to a binary trace file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._start = time.monotonic()
+        self._last: Dict[int, bool] = {}
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, time.time()))
+        self.samples = 0
+
+    def record(self, name: str, value: bool):
+        """Record a sample; unchanged values are skipped"""
+        channel = CHANNEL_IDS.get(name)
+        if channel is None:
+            return
+        value = bool(value)
+        if self._last.get(channel) is value:
+            return
+        offset = int((time.monotonic() - self._start) * 1_000_000)
+        with self._lock:
+            if self._file is None:
+                return
+            self._last[channel] = value
+            self._file.write(RECORD.pack(offset, channel, value))
+            self.samples += 1
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+                logger.info(f"Trace closed: {self.samples} samples in {self.path}")
+
+
+def read_trace(path: str) -> Tuple[float, List[Tuple[float, str, bool]]]:
+    """Read a trace file, returns (start_epoch, [(offset_s, channel, value)])"""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: truncated trace header")
+    magic, version, start_epoch = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a LinkedBench trace (v{VERSION})")
+
+    samples = []
+    body = len(data) - HEADER.size
+    # A partially written last record (e.g. after power loss) is ignored
+    end = HEADER.size + body - body % RECORD.size
+    for offset, channel, value in RECORD.iter_unpack(data[HEADER.size:end]):
+        samples.append((offset / 1_000_000, CHANNELS[channel], bool(value)))
+    return start_epoch, samples
+
+
+# ================= REPLAY =================
+
+class _ReplayInput:
+    """Mixin that reads sensor values from the replay clock instead of GPIO"""
+
+    def __init__(self, name: str, player: 'TracePlayer'):
+        self.name = name
+        self.player = player
+        self.last_state = False
+        self.debounce_time = 0.2
+        self.last_change = 0
+        self.clock = player.clock
+        self.recorder = None
+
+    def read_raw(self) -> bool:
+        return self.player.value(self.name)
+
+    def set_led(self, state: bool):
+        pass
+
+
+class _NullLED:
+    def set_pattern(self, pattern_type):
+        pass
+
+    def cleanup(self):
+        pass
+
+
+class _NullBuzzer:
+    def __getattr__(self, name):
+        if name.startswith('beep'):
+            return lambda *args: None
+        raise AttributeError(name)
+
+
+def _allow_without_gpio():
+    """
+    Replay never touches GPIO, but linkedbench3 and sensors2 import RPi.GPIO.
+    Where it is missing (dev machines, CI), register a placeholder that
+    fails on any use, so the import works and real GPIO access still errors.
+    """
+    try:
+        import RPi.GPIO  # noqa: F401
+        return
+    except (ImportError, RuntimeError):
+        # RuntimeError: RPi.GPIO installed but not running on a Pi
+        pass
+
+    def __getattr__(name):
+        raise AttributeError(f"RPi.GPIO.{name}: GPIO is not available during trace replay")
+
+    gpio = types.ModuleType('RPi.GPIO')
+    gpio.__getattr__ = __getattr__
+    rpi = types.ModuleType('RPi')
+    rpi.GPIO = gpio
+    sys.modules['RPi'] = rpi
+    sys.modules['RPi.GPIO'] = gpio
+
+
+class TracePlayer:
+    """Replays a trace through the LinkedBench state machine"""
+
+    def __init__(self, path: str, bench_id: str = "REPLAY", config=None):
+        self.path = path
+        self.bench_id = bench_id
+        # [occupancy] and [sampling] settings; None uses the built-in defaults
+        self.config = config
+        self.start_epoch, self.samples = read_trace(path)
+        self.now = 0.0
+        self._values = {name: False for name in CHANNELS}
+        self._next = 0
+
+    @property
+    def duration(self) -> float:
+        return self.samples[-1][0] if self.samples else 0.0
+
+    def value(self, name: str) -> bool:
+        return self._values[name]
+
+    def clock(self) -> float:
+        return self.start_epoch + self.now
+
+    def _advance(self, t: float):
+        """Apply every sample up to virtual time t"""
+        self.now = t
+        while self._next < len(self.samples) and self.samples[self._next][0] <= t:
+            _, name, value = self.samples[self._next]
+            self._values[name] = value
+            self._next += 1
+
+    def _settled(self, bench) -> bool:
+        """True when every sensor's debounced state matches its raw input"""
+        if bench.occupancy.pending:
+            return False
+        return all(sensor.last_state == self._values[sensor.name]
+                   for sensor in (bench.pressure1, bench.pressure2, bench.mode_button))
+
+    def _next_tick(self, bench, index: int, period: float) -> int:
+        """
+        Index of the next sampling instant on a grid of `period`. While the
+        inputs are settled the steps are no-ops, so idle stretches jump
+        straight to the next recorded change.
+        """
+        index += 1
+        if self._settled(bench) and self._next < len(self.samples):
+            next_change = self.samples[self._next][0]
+            index = max(index, math.ceil(next_change / period - 1e-9))
+        return index
+
+    def build_bench(self):
+        """Create a LinkedBenchSystem wired to this trace (no GPIO access)"""
+        _allow_without_gpio()
+        import linkedbench3
+        from occupancy import OccupancyFilter
+        from sensors2 import PressurePlate, ModeButton
+
+        player = self
+
+        class ReplayPlate(_ReplayInput, PressurePlate):
+            pass
+
+        class ReplayButton(_ReplayInput, ModeButton):
+            pass
+
+        class ReplayBench(linkedbench3.LinkedBenchSystem):
+            def __init__(self):
+                occupancy = None
+                if player.config is not None:
+                    occupancy = OccupancyFilter.from_config(player.config)
+                self._init_state(player.bench_id, occupancy)
+                self.pressure1 = ReplayPlate('Seat1', player)
+                self.pressure2 = ReplayPlate('Seat2', player)
+                self.mode_button = ReplayButton('ModeButton', player)
+                self.led = _NullLED()
+                self.buzzer = _NullBuzzer()
+                self.display = None
+                self.db = None
+                self.mqtt = None
+                self.recorder = None
+
+            def _clock(self):
+                return player.clock()
+
+        return ReplayBench()
+
+    def replay(self, sink: Optional[Callable[[Dict[str, Any]], Any]] = None,
+               speed: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Feed the trace through _seat_step and _button_step, each on its own
+        grid of sampling instants (seats first on a tie, as in the live loop).
+
+        speed=None runs as fast as possible, speed=1.0 in real time.
+        Every generated event is passed to sink (e.g. EventDatabase.save_event).
+        """
+        bench = self.build_bench()
+        import linkedbench3
+
+        self._values = {name: False for name in CHANNELS}
+        self._next = 0
+        seat_rate, button_rate = linkedbench3.sampling_rates(self.config)
+        seat_period, button_period = 1.0 / seat_rate, 1.0 / button_rate
+
+        events = 0
+        ticks = 0
+        seat_index = button_index = 0
+        wall_start = time.perf_counter()
+        # Keep sampling a little after the last change so debounce settles
+        end = self.duration + 1.0
+        t = 0.0
+        # ...and until held-back vacations are flushed
+        while t <= end or bench.occupancy.pending:
+            if speed:
+                delay = wall_start + t / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self._advance(t)
+            if seat_index * seat_period <= t:
+                bench._seat_step()
+                seat_index = self._next_tick(bench, seat_index, seat_period)
+            if button_index * button_period <= t:
+                bench._button_step()
+                button_index = self._next_tick(bench, button_index, button_period)
+            ticks += 1
+            while not bench.event_queue.empty():
+                event = bench.event_queue.get_nowait()
+                events += 1
+                if sink:
+                    sink(event)
+            t = min(seat_index * seat_period, button_index * button_period)
+
+        wall = time.perf_counter() - wall_start
+        end = max(end, t)
+        bench_days = end / 86400
+        return {
+            'trace': self.path,
+            'samples': len(self.samples),
+            'ticks': ticks,
+            'events': events,
+            'suppressed_events': bench.occupancy.suppressed_events,
+            'seat_flaps': bench.occupancy.flaps,
+            'bench_seconds': round(end, 3),
+            'wall_seconds': round(wall, 6),
+            'bench_days_per_second': round(bench_days / wall, 3) if wall > 0 else None,
+        }
+
+
+def main():
+    import argparse
+    import json
+    from events import encode
+
+    parser = argparse.ArgumentParser(description="Replay a LinkedBench sensor trace")
+    parser.add_argument('trace')
+    parser.add_argument('--speed', type=float, default=None,
+                        help="replay speed (1 = real time, default: as fast as possible)")
+    parser.add_argument('--db', default=None,
+                        help="also store the generated events in this database")
+    parser.add_argument('--print-events', action='store_true')
+    parser.add_argument('--config', default=None,
+                        help="config.ini with the [occupancy] and [sampling] settings to replay with")
+    parser.add_argument('--verbose', action='store_true',
+                        help="keep the per-event INFO logs (slows down replay)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    if not args.verbose:
+        logging.getLogger('LinkedBench').setLevel(logging.WARNING)
+
+    sinks = []
+    db = None
+    if args.db:
+        from database import EventDatabase
+        db = EventDatabase(args.db)
+        sinks.append(db.save_event)
+    if args.print_events:
+        sinks.append(lambda event: print(encode(event)))
+
+    def sink(event):
+        for s in sinks:
+            s(event)
+
+    from config import load_config
+    player = TracePlayer(args.trace, config=load_config(args.config))
+    result = player.replay(sink=sink, speed=args.speed)
+    print(json.dumps(result, indent=2))
+
+    if db:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
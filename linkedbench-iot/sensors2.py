@@ -32,6 +32,9 @@ class PressurePlate:
         self.last_state = False
         self.debounce_time = 0.2
         self.last_change = 0
+        # Monotónico: no salta cuando NTP ajusta la hora al arrancar
+        self.clock = time.monotonic
+        self.recorder = None    # TraceRecorder opcional (ver sensor_trace.py)
 
         # Configuramos el botón (Pin 19) como entrada con resistencia PULL-DOWN
         # Esto es vital: obliga al botón a marcar "0" si no se toca.
@@ -43,10 +46,15 @@ class PressurePlate:
         # Nos aseguramos que el LED empiece apagado
         self.set_led(False)
 
-    def is_pressed(self) -> bool:
-        current_time = time.time()
+    def read_raw(self) -> bool:
         # Leemos el pin BLANCO (19)
-        current_state = not GPIO.input(self.btn_pin)
+        return not GPIO.input(self.btn_pin)
+
+    def is_pressed(self) -> bool:
+        current_time = self.clock()
+        current_state = self.read_raw()
+        if self.recorder is not None:
+            self.recorder.record(self.name, current_state)
 
         # Encendemos el LED si se pulsa (Feedback visual)
         if current_state:
@@ -70,16 +78,24 @@ class ModeButton:
     """
     Botón lateral para cambiar modos
     """
-    def __init__(self, pin: int):
+    def __init__(self, pin: int, name: str = "ModeButton"):
         self.pin = pin
+        self.name = name
         self.last_state = False
         self.debounce_time = 0.2 # TIEMPO AUMENTADO
         self.last_change = 0
+        self.clock = time.monotonic
+        self.recorder = None
         GPIO.setup(self.pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
 
+    def read_raw(self) -> bool:
+        return bool(GPIO.input(self.pin))
+
     def is_pressed(self) -> bool:
-        current_time = time.time()
-        current_state = GPIO.input(self.pin)
+        current_time = self.clock()
+        current_state = self.read_raw()
+        if self.recorder is not None:
+            self.recorder.record(self.name, current_state)
 
         if current_state != self.last_state:
             if current_time - self.last_change > self.debounce_time:
@@ -124,15 +140,15 @@ class BlinkingLED:
             GPIO.output(self.pin, GPIO.HIGH)
             
         elif pattern_type == 'FAST': # Estudiando (Muy rápido)
-            self.thread = threading.Thread(target=self._blink_loop, args=(0.1, 0.1))
+            self.thread = threading.Thread(target=self._blink_loop, args=(0.1, 0.1), name="led-blink")
             self.thread.start()
 
         elif pattern_type == 'MEDIUM': # Charla (Velocidad media)
-            self.thread = threading.Thread(target=self._blink_loop, args=(0.5, 0.5))
+            self.thread = threading.Thread(target=self._blink_loop, args=(0.5, 0.5), name="led-blink")
             self.thread.start()
             
         elif pattern_type == 'SLOW': # Buscando compañero (Lento)
-            self.thread = threading.Thread(target=self._blink_loop, args=(1.0, 1.0))
+            self.thread = threading.Thread(target=self._blink_loop, args=(1.0, 1.0), name="led-blink")
             self.thread.start()
 
     def off(self):
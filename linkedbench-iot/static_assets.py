@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Dashboard assets for the REST API
+
+The script of dashboard.html is moved to its own file with a content
+hash in the name, so it can be cached forever ("immutable"). The page
+keeps its inline CSS (first paint needs no second request) and is
+revalidated with an ETag. Everything is gzip-compressed once, when the
+bundle is built, and served as is to clients that accept gzip.
+
+    python3 static_assets.py --out build/   # write the bundle for inspection
+"""
+
+import gzip
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+DASHBOARD_PATH = str(Path(__file__).with_name('dashboard.html'))
+ASSET_PREFIX = '/assets/'
+
+# Hashed assets never change under the same name
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+# The page keeps its URL: revalidate every time (cheap 304 with the ETag)
+PAGE_CACHE = 'no-cache'
+
+_SCRIPT = re.compile(r'<script>(.*?)</script>', re.S)
+
+
+def gzip_bytes(data: bytes, level: int = 9) -> bytes:
+    # mtime=0: same input, same bytes (stable ETags across restarts)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True if an Accept-Encoding header allows gzip (honours q=0; gzip overrides *)"""
+    qvalues = {}
+    for item in (accept_encoding or '').split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if coding not in ('gzip', '*'):
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = max(q, qvalues.get(coding, 0.0))
+    return qvalues.get('gzip', qvalues.get('*', 0.0)) > 0
+
+
+class Asset:
+    """One file of the bundle, with its gzip version"""
+
+    __slots__ = ('name', 'mimetype', 'body', 'gzipped', 'etag')
+
+    def __init__(self, name: str, mimetype: str, body: bytes):
+        self.name = name
+        self.mimetype = mimetype
+        self.body = body
+        self.gzipped = gzip_bytes(body)
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+
+
+def _hashed(stem: str, ext: str, mimetype: str, text: str) -> Asset:
+    body = text.strip().encode('utf-8') + b'\n'
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    return Asset(f"{stem}.{digest}.{ext}", mimetype, body)
+
+
+class DashboardBundle:
+    """The dashboard page plus its hashed assets"""
+
+    def __init__(self, path: str = DASHBOARD_PATH):
+        html = Path(path).read_text(encoding='utf-8')
+        self.assets: Dict[str, Asset] = {}
+
+        script = _SCRIPT.search(html)
+        if script:
+            js = _hashed('dashboard', 'js', 'application/javascript', script.group(1))
+            self.assets[js.name] = js
+            # Moved to <head> with defer: downloads while the page is parsed
+            html = html.replace(script.group(0), '')
+            html = html.replace('</head>',
+                                f'    <script src="{ASSET_PREFIX}{js.name}" defer></script>\n</head>', 1)
+
+        self.page = Asset('dashboard.html', 'text/html', html.encode('utf-8'))
+
+    def write(self, out_dir: str):
+        """Write the bundle (plain and .gz, like nginx's gzip_static expects)"""
+        out = Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        for asset in [self.page, *self.assets.values()]:
+            (out / asset.name).write_bytes(asset.body)
+            (out / (asset.name + '.gz')).write_bytes(asset.gzipped)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the LinkedBench dashboard bundle")
+    parser.add_argument('--source', default=DASHBOARD_PATH)
+    parser.add_argument('--out', default='build')
+    args = parser.parse_args()
+
+    bundle = DashboardBundle(args.source)
+    bundle.write(args.out)
+    for asset in [bundle.page, *bundle.assets.values()]:
+        print(f"{asset.name:<32} {len(asset.body):>7} B  gzip {len(asset.gzipped):>6} B")
+
+
+if __name__ == '__main__':
+    main()
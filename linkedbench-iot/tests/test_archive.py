@@ -0,0 +1,125 @@
+"""
+Interrupted archival runs must never lose or double-count events
+
+Run from linkedbench-iot/:  python3 -m pytest tests
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import EventDatabase  # noqa: E402
+from fleet_query import FleetQuery  # noqa: E402
+
+EVENTS = 30     # 3 days x 10 events, 40-42 days old
+
+
+def _events(bench_id="BENCH_T", days_ago=40):
+    start = datetime.now() - timedelta(days=days_ago + 2)
+    for i in range(EVENTS):
+        yield {
+            'event_type': 'occupation' if i % 2 else 'vacation',
+            'bench_id': bench_id,
+            'mode': 1,
+            'mode_name': 'Available',
+            'timestamp': (start + timedelta(days=i // 10, minutes=i)).isoformat(),
+        }
+
+
+class InterruptedArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.getLogger('LinkedBench').setLevel(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = EventDatabase(os.path.join(self.tmp.name, 'events.db'))
+        self.db.save_events(list(_events()))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def live_rows(self):
+        return self.db.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def assertAllEventsOnce(self):
+        events = self.db.get_events(limit=1000)
+        self.assertEqual(len(events), EVENTS)
+        self.assertEqual(len({e['id'] for e in events}), EVENTS)
+        self.assertEqual(self.db.get_statistics(days=60)['total_events'], EVENTS)
+
+    def test_torn_index_line(self):
+        """Crash while appending to index.jsonl, then a normal run"""
+        archive = self.db.archive
+        write_chunk = archive.write_chunk
+
+        def crash_after_first_chunk(rows, run_max_id):
+            entry = write_chunk(rows, run_max_id)
+            # Leave half of the entry's index line behind, no newline
+            index = archive.path / 'index.jsonl'
+            data = index.read_bytes()
+            index.write_bytes(data[:-len(data) // 3])
+            raise OSError("power lost")
+
+        archive.write_chunk = crash_after_first_chunk
+        self.assertEqual(self.db.archive_old_events(days=30), 0)
+        self.assertEqual(self.live_rows(), EVENTS)
+        self.assertAllEventsOnce()
+
+        archive.write_chunk = write_chunk
+        self.assertEqual(self.db.archive_old_events(days=30), EVENTS)
+        self.assertEqual(self.live_rows(), 0)
+        self.assertEqual(sum(c['count'] for c in archive.chunks()), EVENTS)
+        self.assertAllEventsOnce()
+
+    def test_interrupted_delete(self):
+        """Chunks indexed but their live rows not deleted yet"""
+        delete = self.db._delete_archived
+        calls = []
+
+        def locked(chunk, batch=10000):
+            calls.append(chunk)
+            if len(calls) > 1:
+                raise RuntimeError("database is locked")
+            delete(chunk, batch)
+
+        self.db._delete_archived = locked
+        self.db.archive_old_events(days=30)
+        self.assertGreater(self.live_rows(), 0)
+        self.assertAllEventsOnce()
+
+        self.db._delete_archived = delete
+        self.db.archive_old_events(days=30)
+        self.assertEqual(self.live_rows(), 0)
+        self.assertAllEventsOnce()
+
+
+class ArchivedBenchTest(unittest.TestCase):
+    """A bench whose events are all archived still exists for fleet queries"""
+
+    def test_fleet_statistics(self):
+        logging.getLogger('LinkedBench').setLevel(logging.CRITICAL)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'events.db')
+            db = EventDatabase(path)
+            db.save_events(list(_events()))
+            db.archive_old_events(days=30)
+            ranges = db.get_bench_ranges()
+            db.close()
+
+            self.assertEqual(list(ranges), ["BENCH_T"])
+            first, last = ranges["BENCH_T"]
+            self.assertLess(first, last)
+            with FleetQuery([path], workers=1) as fleet:
+                stats = fleet.statistics(days=60)
+            self.assertEqual(stats['total_events'], EVENTS)
+            self.assertEqual(stats['per_bench']["BENCH_T"]['total_events'], EVENTS)
+
+
+if __name__ == '__main__':
+    unittest.main()
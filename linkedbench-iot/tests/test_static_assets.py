@@ -0,0 +1,38 @@
+"""
+Accept-Encoding negotiation for the dashboard bundle
+
+Run from linkedbench-iot/:  python3 -m pytest tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from static_assets import accepts_gzip  # noqa: E402
+
+
+class AcceptsGzipTest(unittest.TestCase):
+
+    def test_headers(self):
+        for header, expected in [
+            (None, False),
+            ("", False),
+            ("deflate, br", False),
+            ("gzip, deflate", True),
+            ("*", True),
+            ("gzip; q=0.5", True),
+            ("GZIP;Q=0", False),
+            ("*;q=0", False),
+            # An explicit gzip entry wins over *, wherever it appears
+            ("identity, *;q=0, gzip", True),
+            ("gzip;q=0, *", False),
+            ("br, *;q=0.1", True),
+        ]:
+            with self.subTest(header=header):
+                self.assertIs(accepts_gzip(header), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()